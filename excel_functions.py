@@ -17,6 +17,11 @@ import logging
 from openpyxl import Workbook, load_workbook
 from openpyxl.utils import get_column_letter, column_index_from_string
 
+try:
+    import pyexcelerate  # Optional, much faster writer for bulk exports
+except ImportError:
+    pyexcelerate = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,13 +29,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger('excel_functions')
 
+# Required parameters of each JSON operation, in the order used in error messages
+OPERATION_REQUIRED_PARAMS = {
+    "excel_clear_sheet": (),
+    "excel_add_row": ("row_index", "text"),
+    "excel_write_cell": ("row_index", "col_index", "text"),
+    "excel_write_row": ("row_index", "row_data"),
+    "excel_write_block": ("start_row", "start_col", "data"),
+    "excel_clear_cell": ("row_index", "col_index"),
+    "excel_clear_row": ("row_index",),
+    "excel_clear_column": ("col_index",),
+    "excel_read_header_row": (),
+    "excel_read_column": ("col_index",),
+    "excel_read_cell": ("row_index", "col_index"),
+    "excel_read_row": ("row_index",),
+    "excel_get_column_index_by_header": ("header_name",),
+    "excel_get_row_index_by_value": ("col_index", "search_value"),
+    "excel_update_cell_by_lookup": ("row_header", "row_value", "col_header", "new_value"),
+}
+
+# Same parameters as frozensets, so validation is a single subset check
+_OPERATION_REQUIRED_PARAM_SETS = {
+    function_name: frozenset(required_params)
+    for function_name, required_params in OPERATION_REQUIRED_PARAMS.items()
+}
+
+# Precomputed JSON error feedback, already prefixed with "Error: "
+_ERROR_INVALID_JSON = "Error: Invalid JSON format"
+_ERROR_MISSING_FUNCTION_NAME = "Error: JSON missing 'function_name' field"
+_ERROR_MISSING_PARAMS = {
+    function_name: (f"Error: Missing required parameters for {function_name[len('excel_'):]}. "
+                    f"Needs: {', '.join(required_params)}")
+    for function_name, required_params in OPERATION_REQUIRED_PARAMS.items()
+}
+
 class ExcelHandler:
     """
     ExcelHandler provides a comprehensive set of functions for Excel operations
     including reading, writing, clearing data, and processing JSON commands.
     
     Attributes:
-        filename (str): The name of the Excel file to work with.
+        filename (str or None): The name of the Excel file to work with, or None for an in-memory workbook.
         workbook (Workbook): The openpyxl Workbook object.
         sheet (Worksheet): The active worksheet in the workbook.
     """
@@ -40,18 +79,19 @@ class ExcelHandler:
         Initialize the ExcelHandler with a specified filename.
         
         Args:
-            filename (str): The name of the Excel file to work with.
+            filename (str or None): The name of the Excel file to work with. With None the
+                workbook only lives in memory: nothing is loaded from or saved to disk.
         """
         self.filename = filename
-        logger.info(f"Initializing ExcelHandler with file: {filename}")
+        logger.info("Initializing ExcelHandler with file: %s", filename)
         
         # Create a new workbook or load existing one
-        if os.path.exists(filename):
+        if filename is not None and os.path.exists(filename):
             try:
                 self.workbook = load_workbook(filename)
-                logger.info(f"Loaded existing workbook: {filename}")
+                logger.info("Loaded existing workbook: %s", filename)
             except Exception as e:
-                logger.error(f"Error loading workbook: {str(e)}")
+                logger.error("Error loading workbook: %s", e)
                 self.workbook = Workbook()
                 logger.info("Created new workbook due to loading error")
         else:
@@ -61,8 +101,23 @@ class ExcelHandler:
         # Use the active sheet
         self.sheet = self.workbook.active
         
+        # Batch mode state (see begin_batch / flush_batch)
+        self._batch_mode = False
+        self._pending_inserts = []
+        
+        # Set by process_json_operations() to save once for a whole list of operations;
+        # _save_requested records that the current operation wanted to save
+        self._defer_saves = False
+        self._save_requested = False
+        
+        # JSON operation dispatch table: function_name -> handler method
+        self._op_table = {
+            function_name: getattr(self, f"_json_{function_name[len('excel_'):]}")
+            for function_name in OPERATION_REQUIRED_PARAMS
+        }
+        
         # Save the workbook
-        self.workbook.save(filename)
+        self._save()
     
     #
     # HELPER METHODS
@@ -79,34 +134,34 @@ class ExcelHandler:
             int: Numerical column index or None if invalid
         """
         try:
-            if isinstance(col_index, int):
+            if isinstance(col_index, int) and not isinstance(col_index, bool):
                 if col_index <= 0:
-                    logger.error(f"Column index must be positive, got {col_index}")
+                    logger.error("Column index must be positive, got %s", col_index)
                     return None
-                logger.debug(f"Using numeric column index: {col_index}")
+                logger.debug("Using numeric column index: %s", col_index)
                 return col_index
             elif isinstance(col_index, str):
                 if col_index.isdigit():
                     numeric_index = int(col_index)
                     if numeric_index <= 0:
-                        logger.error(f"Column index must be positive, got {numeric_index}")
+                        logger.error("Column index must be positive, got %s", numeric_index)
                         return None
-                    logger.debug(f"Converted string digit '{col_index}' to numeric column index: {numeric_index}")
+                    logger.debug("Converted string digit '%s' to numeric column index: %s", col_index, numeric_index)
                     return numeric_index
                 else:
                     # Handle column letters (A, B, AA, etc.)
                     try:
                         numeric_index = column_index_from_string(col_index.upper())
-                        logger.debug(f"Converted column letter '{col_index}' to numeric index: {numeric_index}")
+                        logger.debug("Converted column letter '%s' to numeric index: %s", col_index, numeric_index)
                         return numeric_index
                     except Exception as e:
-                        logger.error(f"Invalid column letter: '{col_index}', error: {str(e)}")
+                        logger.error("Invalid column letter: '%s', error: %s", col_index, e)
                         return None
             else:
-                logger.error(f"Invalid column index type: {type(col_index).__name__}")
+                logger.error("Invalid column index type: %s", type(col_index).__name__)
                 return None
         except Exception as e:
-            logger.error(f"Error in _get_col_index: {str(e)}")
+            logger.error("Error in _get_col_index: %s", e)
             return None
     
     def _validate_row_index(self, row_index):
@@ -125,7 +180,8 @@ class ExcelHandler:
         if isinstance(row_index, str) and row_index.isdigit():
             row_index = int(row_index)
         
-        if not isinstance(row_index, int):
+        # bool is a subclass of int, but True/False are not row indices
+        if isinstance(row_index, bool) or not isinstance(row_index, int):
             return False
         
         return row_index > 0
@@ -188,18 +244,120 @@ class ExcelHandler:
         
         Args:
             params (dict): Parameters to validate
-            required_params (list): List of required parameter names
+            required_params (frozenset): Set of required parameter names
             
         Returns:
             bool: True if all required parameters are present, False otherwise
         """
-        if not params:
-            return len(required_params) == 0
+        return required_params.issubset(params)
+    
+    def _save(self):
+        """
+        Save the workbook to disk, unless batch mode is active or it is in memory only.
+        
+        In batch mode the save is deferred until flush_batch() is called. While
+        process_json_operations() runs, it is deferred until the last operation.
+        """
+        if self._defer_saves:
+            self._save_requested = True
+            return
+        if self._batch_mode or self.filename is None:
+            return
+        self.workbook.save(self.filename)
+    
+    #
+    # BATCH OPERATIONS
+    #
+    
+    def _apply_pending_inserts(self):
+        """
+        Apply the row inserts queued by add_row() in batch mode.
+        
+        Inserts are applied in descending row order so that earlier inserts
+        do not shift the positions of the ones still to be applied. Inserts
+        that target the same row are applied with a single insert_rows() call.
+        
+        Returns:
+            int: Number of inserts applied
+        """
+        pending_inserts = self._pending_inserts
+        if not pending_inserts:
+            return 0
+        self._pending_inserts = []
+        
+        # Stable sort keeps the call order for inserts at the same row
+        pending_inserts.sort(key=lambda insert: insert[0], reverse=True)
+        
+        i = 0
+        while i < len(pending_inserts):
+            row_index = pending_inserts[i][0]
+            j = i
+            while j < len(pending_inserts) and pending_inserts[j][0] == row_index:
+                j += 1
+            
+            # Each later insert at the same row pushes the earlier ones down
+            group_texts = [text for _, text in pending_inserts[i:j]]
+            self.sheet.insert_rows(row_index, amount=len(group_texts))
+            for offset, text in enumerate(reversed(group_texts)):
+                self.sheet.cell(row=row_index + offset, column=1).value = text
+            i = j
+        
+        return len(pending_inserts)
+    
+    def begin_batch(self):
+        """
+        Enter batch mode.
+        
+        While in batch mode, workbook saves are deferred and add_row() calls
+        with an explicit row index are queued instead of being applied
+        immediately. Queued row indices refer to the sheet as it was when the
+        batch started. Every other operation that changes the sheet (including
+        add_row() with "next_available", write_cell(), write_row() and
+        clear_row()) first applies the queued inserts, so it sees them in place
+        and later queued indices refer to the sheet after that operation. Read
+        operations and export_sheet() do not apply the queue. Call
+        flush_batch() to apply the remaining queued inserts and save.
+        
+        Returns:
+            tuple: (success, message)
+                - success (bool): True if operation succeeded, False otherwise
+                - message (str): Success or error message
+        """
+        if self._batch_mode:
+            warning_msg = "Batch mode is already active"
+            logger.warning(warning_msg)
+            return True, warning_msg
+        
+        self._batch_mode = True
+        self._pending_inserts = []
+        success_msg = "Batch mode started"
+        logger.info(success_msg)
+        return True, success_msg
+    
+    def flush_batch(self):
+        """
+        Apply all queued row inserts, save the workbook and leave batch mode.
+        
+        Returns:
+            tuple: (success, message)
+                - success (bool): True if operation succeeded, False otherwise
+                - message (str): Success or error message
+        """
+        try:
+            num_inserts = self._apply_pending_inserts()
             
-        for param in required_params:
-            if param not in params:
-                return False
-        return True
+            self._batch_mode = False
+            self._save()
+            
+            success_msg = f"Batch flushed. Applied {num_inserts} queued row inserts."
+            logger.info(success_msg)
+            
+            return True, success_msg
+        except Exception as e:
+            self._batch_mode = False
+            error_msg = f"Error flushing batch: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
     
     #
     # EXCEL OPERATIONS
@@ -215,6 +373,8 @@ class ExcelHandler:
                 - message (str): Success or error message
         """
         try:
+            self._apply_pending_inserts()
+            
             # Get sheet dimensions before clearing
             max_row = self.sheet.max_row
             max_col = self.sheet.max_column
@@ -256,6 +416,17 @@ class ExcelHandler:
                 logger.error(error_msg)
                 return False, error_msg
             
+            # In batch mode, queue explicit inserts to be applied together on flush
+            if self._batch_mode and row_index != "next_available":
+                actual_row_index = self._get_actual_row_index(row_index)
+                self._pending_inserts.append((actual_row_index, text))
+                success_msg = f"New row insert at position {actual_row_index} queued. Text '{text}' will be added to column A"
+                logger.info(success_msg)
+                return True, success_msg
+            
+            # "next_available" depends on the current sheet, so apply queued inserts first
+            self._apply_pending_inserts()
+            
             # Get actual row index
             actual_row_index = self._get_actual_row_index(row_index)
             
@@ -270,7 +441,7 @@ class ExcelHandler:
             logger.info(success_msg)
             
             # Save the workbook
-            self.workbook.save(self.filename)
+            self._save()
             
             return True, success_msg
         except Exception as e:
@@ -293,10 +464,12 @@ class ExcelHandler:
                 - message (str): Success or error message
         """
         try:
+            self._apply_pending_inserts()
+            
             # Convert string row_index to int if it's a digit
             if isinstance(row_index, str) and row_index.isdigit():
                 row_index = int(row_index)
-                logger.info(f"Converted string row_index to int: {row_index}")
+                logger.info("Converted string row_index to int: %s", row_index)
             
             # Validate row_index
             if not self._validate_row_index(row_index):
@@ -305,7 +478,7 @@ class ExcelHandler:
                 return False, error_msg
             
             # Get the column index if it's a letter
-            logger.info(f"Processing column index: {col_index} (type: {type(col_index).__name__})")
+            logger.info("Processing column index: %s (type: %s)", col_index, type(col_index).__name__)
             num_col_index = self._get_col_index(col_index)
             if num_col_index is None:
                 error_msg = f"Invalid column index: {col_index}"
@@ -316,7 +489,7 @@ class ExcelHandler:
             col_letter = get_column_letter(num_col_index)
             
             # Log explicit target coordinates before writing
-            logger.info(f"TARGET CELL: Row={row_index}, Column={num_col_index} (Letter: {col_letter})")
+            logger.info("TARGET CELL: Row=%s, Column=%s (Letter: %s)", row_index, num_col_index, col_letter)
             
             # Create formatted cell reference
             cell_ref = self._format_cell_reference(row_index, col_letter)
@@ -326,20 +499,21 @@ class ExcelHandler:
             old_value = target_cell.value
             target_cell.value = text
             
-            # Additional verification that the cell was written correctly
-            verification_value = self.sheet.cell(row=row_index, column=num_col_index).value
-            logger.info(f"Cell value verification: Old={old_value}, New={verification_value}, Expected={text}")
-            
-            # Verify A1 remains unchanged if we're not writing to A1
-            if row_index != 1 or num_col_index != 1:
-                a1_value = self.sheet.cell(row=1, column=1).value
-                logger.info(f"Verifying A1 value remains unchanged: {a1_value}")
+            # Additional verification logging, only done when INFO logging is enabled
+            if logger.isEnabledFor(logging.INFO):
+                verification_value = self.sheet.cell(row=row_index, column=num_col_index).value
+                logger.info("Cell value verification: Old=%s, New=%s, Expected=%s", old_value, verification_value, text)
+                
+                # Verify A1 remains unchanged if we're not writing to A1
+                if row_index != 1 or num_col_index != 1:
+                    a1_value = self.sheet.cell(row=1, column=1).value
+                    logger.info("Verifying A1 value remains unchanged: %s", a1_value)
             
             success_msg = f"Value '{text}' written to {cell_ref}"
             logger.info(success_msg)
             
             # Save the workbook
-            self.workbook.save(self.filename)
+            self._save()
             
             return True, success_msg
         except Exception as e:
@@ -361,6 +535,8 @@ class ExcelHandler:
                 - message (str): Success or error message
         """
         try:
+            self._apply_pending_inserts()
+            
             # Validate row_index
             if not self._validate_row_index(row_index):
                 error_msg = f"Invalid row index: {row_index}. Row index must be positive integer."
@@ -374,13 +550,14 @@ class ExcelHandler:
                 logger.error(error_msg)
                 return False, error_msg
                 
-            # Check if row_data is iterable
-            try:
-                iterator = iter(row_data)
-            except TypeError:
-                error_msg = f"Row data must be iterable, got {type(row_data).__name__}"
-                logger.error(error_msg)
-                return False, error_msg
+            # Check if row_data is iterable (lists and tuples are used as-is)
+            if not isinstance(row_data, (list, tuple)):
+                try:
+                    row_data = list(row_data)
+                except TypeError:
+                    error_msg = f"Row data must be iterable, got {type(row_data).__name__}"
+                    logger.error(error_msg)
+                    return False, error_msg
             
             # Write data to the row
             for i, value in enumerate(row_data, 1):
@@ -392,7 +569,7 @@ class ExcelHandler:
             logger.info(success_msg)
             
             # Save the workbook
-            self.workbook.save(self.filename)
+            self._save()
             
             return True, success_msg
         except Exception as e:
@@ -400,6 +577,88 @@ class ExcelHandler:
             logger.error(error_msg)
             return False, error_msg
     
+    def write_block(self, start_row, start_col, data):
+        """
+        Write a 2D block of values starting at a specific cell.
+        
+        All values are written in one pass and the workbook is saved once,
+        instead of one write_row/write_cell call (and save) per row or cell.
+        
+        Args:
+            start_row (int): Row index of the top-left cell (1-based)
+            start_col (int or str): Column index (1-based) or letter (A, B, etc.) of the top-left cell
+            data (list): List of rows, each row being a list of values
+            
+        Returns:
+            tuple: (success, message)
+                - success (bool): True if operation succeeded, False otherwise
+                - message (str): Success or error message
+        """
+        try:
+            self._apply_pending_inserts()
+            
+            # Validate start_row
+            if start_row == "next_available" or not self._validate_row_index(start_row):
+                error_msg = f"Invalid start row: {start_row}. Row index must be positive integer."
+                logger.error(error_msg)
+                return False, error_msg
+            
+            if isinstance(start_row, str):
+                start_row = int(start_row)
+            
+            # Get the column index if it's a letter
+            num_col_index = self._get_col_index(start_col)
+            if num_col_index is None:
+                error_msg = f"Invalid column index: {start_col}"
+                logger.error(error_msg)
+                return False, error_msg
+            
+            # Check that data is a non-empty collection of rows
+            if isinstance(data, str) or not isinstance(data, (list, tuple)) or not data:
+                error_msg = "Block data must be a non-empty list of rows"
+                logger.error(error_msg)
+                return False, error_msg
+            
+            for row_data in data:
+                if isinstance(row_data, str) or not isinstance(row_data, (list, tuple)):
+                    error_msg = f"Each row of block data must be a list of values, got {type(row_data).__name__}"
+                    logger.error(error_msg)
+                    return False, error_msg
+                if not row_data:
+                    error_msg = "Each row of block data must contain at least one value"
+                    logger.error(error_msg)
+                    return False, error_msg
+            
+            # Check that the block is rectangular
+            if len({len(row_data) for row_data in data}) != 1:
+                error_msg = "Invalid data: all rows must have the same number of values"
+                logger.error(error_msg)
+                return False, error_msg
+            
+            # Write all values of the block
+            cell = self.sheet.cell
+            for row_offset, row_data in enumerate(data):
+                row_index = start_row + row_offset
+                for col_offset, value in enumerate(row_data):
+                    cell(row=row_index, column=num_col_index + col_offset).value = value
+            
+            # Describe the written range
+            num_cols = len(data[0])
+            start_ref = f"{get_column_letter(num_col_index)}{start_row}"
+            end_ref = f"{get_column_letter(num_col_index + num_cols - 1)}{start_row + len(data) - 1}"
+            
+            success_msg = f"Data written to block {start_ref}:{end_ref} ({len(data)} rows by {num_cols} columns)"
+            logger.info(success_msg)
+            
+            # Save the workbook
+            self._save()
+            
+            return True, success_msg
+        except Exception as e:
+            error_msg = f"Error writing block: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+    
     def clear_cell(self, row_index, col_index):
         """
         Clear the content of a specific cell.
@@ -414,6 +673,8 @@ class ExcelHandler:
                 - message (str): Success or error message
         """
         try:
+            self._apply_pending_inserts()
+            
             # Validate row_index
             if not self._validate_row_index(row_index):
                 error_msg = f"Invalid row index: {row_index}. Row index must be positive integer."
@@ -440,7 +701,7 @@ class ExcelHandler:
             logger.info(success_msg)
             
             # Save the workbook
-            self.workbook.save(self.filename)
+            self._save()
             
             return True, success_msg
         except Exception as e:
@@ -461,6 +722,8 @@ class ExcelHandler:
                 - message (str): Success or error message
         """
         try:
+            self._apply_pending_inserts()
+            
             # Validate row_index
             if not self._validate_row_index(row_index):
                 error_msg = f"Invalid row index: {row_index}. Row index must be positive integer."
@@ -482,7 +745,7 @@ class ExcelHandler:
             logger.info(success_msg)
             
             # Save the workbook
-            self.workbook.save(self.filename)
+            self._save()
             
             return True, success_msg
         except Exception as e:
@@ -503,6 +766,8 @@ class ExcelHandler:
                 - message (str): Success or error message
         """
         try:
+            self._apply_pending_inserts()
+            
             # Get the column index if it's a letter
             num_col_index = self._get_col_index(col_index)
             if num_col_index is None:
@@ -524,7 +789,7 @@ class ExcelHandler:
             logger.info(success_msg)
             
             # Save the workbook
-            self.workbook.save(self.filename)
+            self._save()
             
             return True, success_msg
         except Exception as e:
@@ -790,6 +1055,8 @@ class ExcelHandler:
                 - message (str): Success or error message with details of the operation
         """
         try:
+            self._apply_pending_inserts()
+            
             # Step 1: Find column index for row identifier
             row_col_idx, message = self.get_column_index_by_header(row_header)
             if not row_col_idx:
@@ -831,6 +1098,316 @@ class ExcelHandler:
             logger.error(error_msg)
             return False, error_msg
     
+    def export_sheet(self, output_filename):
+        """
+        Export the values of the active sheet to a new Excel file.
+        
+        The export only carries cell values (no styles), which lets it skip
+        openpyxl's per-cell objects: pyexcelerate is used when it is installed,
+        otherwise an openpyxl write-only workbook. Row inserts still queued in
+        batch mode are not included.
+        
+        Args:
+            output_filename (str): The name of the Excel file to export to.
+            
+        Returns:
+            tuple: (success, message)
+                - success (bool): True if operation succeeded, False otherwise
+                - message (str): Success or error message
+        """
+        try:
+            rows = self.sheet.iter_rows(values_only=True)
+            sheet_name = self.sheet.title
+            
+            if pyexcelerate is not None:
+                rows = [list(row) for row in rows]
+                row_count = len(rows)
+                export_workbook = pyexcelerate.Workbook()
+                export_workbook.new_sheet(sheet_name, data=rows)
+                export_workbook.save(output_filename)
+            else:
+                export_workbook = Workbook(write_only=True)
+                export_sheet = export_workbook.create_sheet(sheet_name)
+                row_count = 0
+                for row in rows:
+                    export_sheet.append(row)
+                    row_count += 1
+                export_workbook.save(output_filename)
+            
+            success_msg = f"Sheet '{sheet_name}' exported to {output_filename} ({row_count} rows)"
+            logger.info(success_msg)
+            
+            return True, success_msg
+        except Exception as e:
+            error_msg = f"Error exporting sheet: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+    
+    #
+    # JSON OPERATION HANDLERS
+    #
+    # Each handler receives the validated "parameters" dict of a JSON operation
+    # and returns a (success, feedback) tuple, where feedback is already prefixed
+    # with "Success: " or "Error: ". Required parameters are checked by
+    # process_json_operation() before the handler is called.
+    #
+    
+    def _prefix_feedback(self, success, message):
+        """Turn a direct API (success, message) result into (success, feedback)."""
+        if success:
+            return True, f"Success: {message}"
+        return False, f"Error: {message}"
+    
+    def _json_clear_sheet(self, parameters):
+        """Handle the excel_clear_sheet JSON operation."""
+        return self._prefix_feedback(*self.clear_sheet())
+    
+    def _json_add_row(self, parameters):
+        """Handle the excel_add_row JSON operation."""
+        # Extra validation for row_index
+        row_index = parameters["row_index"]
+        if not (row_index == "next_available" or 
+                (isinstance(row_index, int) and row_index > 0) or
+                (isinstance(row_index, str) and row_index.isdigit() and int(row_index) > 0)):
+            error_msg = f"Invalid row_index: {row_index}. Must be positive integer or 'next_available'"
+            logger.error(error_msg)
+            return False, f"Error: {error_msg}"
+        
+        return self._prefix_feedback(*self.add_row(
+            parameters["row_index"],
+            parameters["text"]
+        ))
+    
+    def _json_write_cell(self, parameters):
+        """Handle the excel_write_cell JSON operation."""
+        # Extract parameters with detailed logging
+        row_index = parameters["row_index"]
+        col_index = parameters["col_index"]
+        text = parameters["text"]
+        
+        logger.info("JSON WRITE_CELL PARAMETERS - row_index: %s (%s), col_index: %s (%s), text: %s",
+                    row_index, type(row_index).__name__, col_index, type(col_index).__name__, text)
+        
+        # Extra validation for row_index
+        if not (isinstance(row_index, int) and row_index > 0 or 
+                isinstance(row_index, str) and row_index.isdigit() and int(row_index) > 0):
+            error_msg = f"Invalid row_index: {row_index}. Must be positive integer"
+            logger.error(error_msg)
+            return False, f"Error: {error_msg}"
+        
+        # Extra validation for col_index
+        if isinstance(col_index, str):
+            # If it's a letter, make sure it's a valid column letter
+            if not col_index.isdigit() and (len(col_index) > 3 or not all(c.isalpha() for c in col_index)):
+                error_msg = f"Invalid col_index: {col_index}. Must be a column letter (A-Z) or positive integer"
+                logger.error(error_msg)
+                return False, f"Error: {error_msg}"
+        elif not (isinstance(col_index, int) and col_index > 0):
+            error_msg = f"Invalid col_index: {col_index}. Must be positive integer or column letter"
+            logger.error(error_msg)
+            return False, f"Error: {error_msg}"
+        
+        # Convert row_index to integer if it's a string digit
+        if isinstance(row_index, str) and row_index.isdigit():
+            row_index = int(row_index)
+            parameters["row_index"] = row_index
+            logger.info("Converted row_index string to int: %s", row_index)
+        
+        # Log the exact cell we're targeting
+        logger.info("JSON WRITE TARGETING: Row %s, Column %s", row_index, col_index)
+        
+        # Call the write_cell method with explicit parameter names
+        return self._prefix_feedback(*self.write_cell(
+            row_index=row_index,
+            col_index=col_index,
+            text=text
+        ))
+    
+    def _json_write_row(self, parameters):
+        """Handle the excel_write_row JSON operation."""
+        # Validate row_data is iterable (lists and tuples skip the iter() check)
+        row_data = parameters["row_data"]
+        if not isinstance(row_data, (list, tuple)):
+            try:
+                iter(row_data)
+            except TypeError:
+                error_msg = f"Invalid row_data: {row_data}. Must be iterable (list, tuple, etc.)"
+                logger.error(error_msg)
+                return False, f"Error: {error_msg}"
+        
+        return self._prefix_feedback(*self.write_row(
+            parameters["row_index"],
+            row_data
+        ))
+    
+    def _json_write_block(self, parameters):
+        """Handle the excel_write_block JSON operation."""
+        return self._prefix_feedback(*self.write_block(
+            parameters["start_row"],
+            parameters["start_col"],
+            parameters["data"]
+        ))
+    
+    def _json_clear_cell(self, parameters):
+        """Handle the excel_clear_cell JSON operation."""
+        return self._prefix_feedback(*self.clear_cell(
+            parameters["row_index"],
+            parameters["col_index"]
+        ))
+    
+    def _json_clear_row(self, parameters):
+        """Handle the excel_clear_row JSON operation."""
+        return self._prefix_feedback(*self.clear_row(
+            parameters["row_index"]
+        ))
+    
+    def _json_clear_column(self, parameters):
+        """Handle the excel_clear_column JSON operation."""
+        return self._prefix_feedback(*self.clear_column(
+            parameters["col_index"]
+        ))
+    
+    def _json_read_header_row(self, parameters):
+        """Handle the excel_read_header_row JSON operation."""
+        result, message = self.read_header_row()
+        success = result is not None
+        
+        # Format result for feedback
+        if success:
+            # Create a more descriptive message about the header contents
+            header_description = ", ".join([f"'{h}'" for h in result])
+            message = f"Success: Header row read successfully. Headers found: {header_description}"
+        else:
+            message = f"Error: {message}"
+        
+        return success, message
+    
+    def _json_read_column(self, parameters):
+        """Handle the excel_read_column JSON operation."""
+        col_index = parameters["col_index"]
+        
+        # Get a readable column identifier for the message
+        if isinstance(col_index, int):
+            col_id = f"column {col_index} ({get_column_letter(col_index)})"
+        elif isinstance(col_index, str) and col_index.isalpha():
+            col_id = f"column {col_index}"
+        else:
+            col_id = f"column {col_index}"
+        
+        result, message = self.read_column(
+            parameters["col_index"]
+        )
+        success = result is not None
+        
+        # Format result for feedback
+        if success:
+            # Format column data in a more descriptive way
+            column_data_summary = ", ".join([f"row {i+1}: '{val}'" for i, val in enumerate(result) if val is not None])
+            message = f"Success: {col_id} read successfully. Values: {column_data_summary}"
+        else:
+            message = f"Error: {message}"
+        
+        return success, message
+    
+    def _json_read_cell(self, parameters):
+        """Handle the excel_read_cell JSON operation."""
+        row_index = parameters["row_index"]
+        col_index = parameters["col_index"]
+        
+        result, message = self.read_cell(
+            row_index,
+            col_index
+        )
+        success = result is not None or message.startswith("Value")
+        
+        # Format result for feedback - use cell_ref format
+        if success:
+            # Get column letter for better formatting
+            num_col_index = self._get_col_index(col_index)
+            if num_col_index:
+                col_letter = get_column_letter(num_col_index)
+                cell_ref = self._format_cell_reference(row_index, col_letter)
+                message = f"Success: Read value '{result}' from {cell_ref}"
+            else:
+                message = f"Success: Cell read successfully. Result: {result}"
+        else:
+            message = f"Error: {message}"
+        
+        return success, message
+    
+    def _json_read_row(self, parameters):
+        """Handle the excel_read_row JSON operation."""
+        row_index = parameters["row_index"]
+        
+        result, message = self.read_row(
+            row_index
+        )
+        success = result is not None
+        
+        # Format result for feedback
+        if success:
+            # Format row data in a more descriptive way
+            row_data_summary = ", ".join([f"column {get_column_letter(i+1)}: '{val}'" for i, val in enumerate(result) if val is not None])
+            message = f"Success: Row {row_index} read successfully. Values: {row_data_summary}"
+        else:
+            message = f"Error: {message}"
+        
+        return success, message
+    
+    def _json_get_column_index_by_header(self, parameters):
+        """Handle the excel_get_column_index_by_header JSON operation."""
+        result, message = self.get_column_index_by_header(
+            parameters["header_name"]
+        )
+        success = result is not None
+        
+        # Format result for feedback
+        if success:
+            message = f"Success: Column index found by header. Result: {result}"
+        else:
+            message = f"Error: {message}"
+        
+        return success, message
+    
+    def _json_get_row_index_by_value(self, parameters):
+        """Handle the excel_get_row_index_by_value JSON operation."""
+        col_index = parameters["col_index"]
+        search_value = parameters["search_value"]
+        
+        result, message = self.get_row_index_by_value(
+            col_index,
+            search_value
+        )
+        success = result is not None
+        
+        # Format result for feedback
+        if success:
+            message = f"Success: Row index found by value. Result: {result}"
+        else:
+            message = f"Error: {message}"
+        
+        return success, message
+    
+    def _json_update_cell_by_lookup(self, parameters):
+        """Handle the excel_update_cell_by_lookup JSON operation."""
+        row_header = parameters["row_header"]
+        row_value = parameters["row_value"]
+        col_header = parameters["col_header"]
+        new_value = parameters["new_value"]
+        
+        result, message = self.update_cell_by_lookup(
+            row_header,
+            row_value,
+            col_header,
+            new_value
+        )
+        success = result
+        
+        # Format result for feedback
+        if success:
+            return True, f"Success: Cell updated successfully. {message}"
+        return False, f"Error: {message}"
+    
     #
     # JSON OPERATION PROCESSING
     #
@@ -861,321 +1438,85 @@ class ExcelHandler:
             # Parse the JSON
             try:
                 operation = json.loads(json_input)
-                logger.info(f"Processing JSON operation: {json_input}")
+                logger.info("Processing JSON operation: %s", json_input)
             except json.JSONDecodeError:
-                error_msg = "Invalid JSON format"
-                logger.error(error_msg)
-                return -1, f"Error: {error_msg}"
+                logger.error("Invalid JSON format")
+                return -1, _ERROR_INVALID_JSON
             
             # Check if function_name is present
             if "function_name" not in operation:
-                error_msg = "JSON missing 'function_name' field"
-                logger.error(error_msg)
-                return -1, f"Error: {error_msg}"
+                logger.error("JSON missing 'function_name' field")
+                return -1, _ERROR_MISSING_FUNCTION_NAME
             
             function_name = operation["function_name"]
-            parameters = operation.get("parameters", {})
+            parameters = operation.get("parameters") or {}
             
             # Log parameter validation
-            logger.info(f"Function: {function_name}, Parameters: {parameters}")
-            
-            # Process the operation based on function_name
-            if function_name == "excel_clear_sheet":
-                success, message = self.clear_sheet()
-            
-            elif function_name == "excel_add_row":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index", "text"]):
-                    error_msg = "Missing required parameters for add_row. Needs: row_index, text"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                # Extra validation for row_index
-                row_index = parameters["row_index"]
-                if not (row_index == "next_available" or 
-                        (isinstance(row_index, int) and row_index > 0) or
-                        (isinstance(row_index, str) and row_index.isdigit() and int(row_index) > 0)):
-                    error_msg = f"Invalid row_index: {row_index}. Must be positive integer or 'next_available'"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                success, message = self.add_row(
-                    parameters["row_index"],
-                    parameters["text"]
-                )
-            
-            elif function_name == "excel_write_cell":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index", "col_index", "text"]):
-                    error_msg = "Missing required parameters for write_cell. Needs: row_index, col_index, text"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                # Extract parameters with detailed logging
-                row_index = parameters["row_index"]
-                col_index = parameters["col_index"]
-                text = parameters["text"]
-                
-                logger.info(f"JSON WRITE_CELL PARAMETERS - row_index: {row_index} ({type(row_index).__name__}), " +
-                            f"col_index: {col_index} ({type(col_index).__name__}), text: {text}")
-                
-                # Extra validation for row_index
-                if not (isinstance(row_index, int) and row_index > 0 or 
-                        isinstance(row_index, str) and row_index.isdigit() and int(row_index) > 0):
-                    error_msg = f"Invalid row_index: {row_index}. Must be positive integer"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                # Extra validation for col_index
-                if isinstance(col_index, str):
-                    # If it's a letter, make sure it's a valid column letter
-                    if not col_index.isdigit() and (len(col_index) > 3 or not all(c.isalpha() for c in col_index)):
-                        error_msg = f"Invalid col_index: {col_index}. Must be a column letter (A-Z) or positive integer"
-                        logger.error(error_msg)
-                        return -1, f"Error: {error_msg}"
-                elif not (isinstance(col_index, int) and col_index > 0):
-                    error_msg = f"Invalid col_index: {col_index}. Must be positive integer or column letter"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                # Convert row_index to integer if it's a string digit
-                if isinstance(row_index, str) and row_index.isdigit():
-                    row_index = int(row_index)
-                    parameters["row_index"] = row_index
-                    logger.info(f"Converted row_index string to int: {row_index}")
-                
-                # Log the exact cell we're targeting
-                logger.info(f"JSON WRITE TARGETING: Row {row_index}, Column {col_index}")
-                
-                # Call the write_cell method with explicit parameter names
-                success, message = self.write_cell(
-                    row_index=row_index,
-                    col_index=col_index,
-                    text=text
-                )
-            
-            elif function_name == "excel_write_row":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index", "row_data"]):
-                    error_msg = "Missing required parameters for write_row. Needs: row_index, row_data"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                # Validate row_data is iterable
-                try:
-                    iter(parameters["row_data"])
-                except TypeError:
-                    error_msg = f"Invalid row_data: {parameters['row_data']}. Must be iterable (list, tuple, etc.)"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                success, message = self.write_row(
-                    parameters["row_index"],
-                    parameters["row_data"]
-                )
-            
-            elif function_name == "excel_clear_cell":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index", "col_index"]):
-                    error_msg = "Missing required parameters for clear_cell. Needs: row_index, col_index"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                success, message = self.clear_cell(
-                    parameters["row_index"],
-                    parameters["col_index"]
-                )
-            
-            elif function_name == "excel_clear_row":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index"]):
-                    error_msg = "Missing required parameters for clear_row. Needs: row_index"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                success, message = self.clear_row(
-                    parameters["row_index"]
-                )
-            
-            elif function_name == "excel_clear_column":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["col_index"]):
-                    error_msg = "Missing required parameters for clear_column. Needs: col_index"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                success, message = self.clear_column(
-                    parameters["col_index"]
-                )
+            logger.info("Function: %s, Parameters: %s", function_name, parameters)
             
-            elif function_name == "excel_read_header_row":
-                result, message = self.read_header_row()
-                success = result is not None
-                
-                # Format result for feedback
-                if success:
-                    # Create a more descriptive message about the header contents
-                    header_description = ", ".join([f"'{h}'" for h in result])
-                    message = f"Success: Header row read successfully. Headers found: {header_description}"
-            
-            elif function_name == "excel_read_column":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["col_index"]):
-                    error_msg = "Missing required parameters for read_column. Needs: col_index"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                col_index = parameters["col_index"]
-                
-                # Get a readable column identifier for the message
-                if isinstance(col_index, int):
-                    col_id = f"column {col_index} ({get_column_letter(col_index)})"
-                elif isinstance(col_index, str) and col_index.isalpha():
-                    col_id = f"column {col_index}"
-                else:
-                    col_id = f"column {col_index}"
-                
-                result, message = self.read_column(
-                    parameters["col_index"]
-                )
-                success = result is not None
-                
-                # Format result for feedback
-                if success:
-                    # Format column data in a more descriptive way
-                    column_data_summary = ", ".join([f"row {i+1}: '{val}'" for i, val in enumerate(result) if val is not None])
-                    message = f"Success: {col_id} read successfully. Values: {column_data_summary}"
-            
-            elif function_name == "excel_read_cell":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index", "col_index"]):
-                    error_msg = "Missing required parameters for read_cell. Needs: row_index, col_index"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                row_index = parameters["row_index"]
-                col_index = parameters["col_index"]
-                
-                result, message = self.read_cell(
-                    row_index,
-                    col_index
-                )
-                success = result is not None or message.startswith("Value")
-                
-                # Format result for feedback - use cell_ref format
-                if success:
-                    # Get column letter for better formatting
-                    num_col_index = self._get_col_index(col_index)
-                    if num_col_index:
-                        col_letter = get_column_letter(num_col_index)
-                        cell_ref = self._format_cell_reference(row_index, col_letter)
-                        message = f"Success: Read value '{result}' from {cell_ref}"
-                    else:
-                        message = f"Success: Cell read successfully. Result: {result}"
+            # Look up the handler for function_name
+            handler = self._op_table.get(function_name)
+            if handler is None:
+                logger.error("Unknown function: %s", function_name)
+                return -1, f"Error: Unknown function: {function_name}"
             
-            elif function_name == "excel_read_row":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_index"]):
-                    error_msg = "Missing required parameters for read_row. Needs: row_index"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                row_index = parameters["row_index"]
-                
-                result, message = self.read_row(
-                    row_index
-                )
-                success = result is not None
-                
-                # Format result for feedback
-                if success:
-                    # Format row data in a more descriptive way
-                    row_data_summary = ", ".join([f"column {get_column_letter(i+1)}: '{val}'" for i, val in enumerate(result) if val is not None])
-                    message = f"Success: Row {row_index} read successfully. Values: {row_data_summary}"
-            
-            elif function_name == "excel_get_column_index_by_header":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["header_name"]):
-                    error_msg = "Missing required parameters for get_column_index_by_header. Needs: header_name"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                result, message = self.get_column_index_by_header(
-                    parameters["header_name"]
-                )
-                success = result is not None
-                
-                # Format result for feedback
-                if success:
-                    message = f"Success: Column index found by header. Result: {result}"
-            
-            elif function_name == "excel_get_row_index_by_value":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["col_index", "search_value"]):
-                    error_msg = "Missing required parameters for get_row_index_by_value. Needs: col_index, search_value"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                col_index = parameters["col_index"]
-                search_value = parameters["search_value"]
-                
-                result, message = self.get_row_index_by_value(
-                    col_index,
-                    search_value
-                )
-                success = result is not None
-                
-                # Format result for feedback
-                if success:
-                    message = f"Success: Row index found by value. Result: {result}"
-            
-            elif function_name == "excel_update_cell_by_lookup":
-                # Check required parameters
-                if not self._validate_parameters(parameters, ["row_header", "row_value", "col_header", "new_value"]):
-                    error_msg = "Missing required parameters for update_cell_by_lookup. Needs: row_header, row_value, col_header, new_value"
-                    logger.error(error_msg)
-                    return -1, f"Error: {error_msg}"
-                
-                row_header = parameters["row_header"]
-                row_value = parameters["row_value"]
-                col_header = parameters["col_header"]
-                new_value = parameters["new_value"]
-                
-                result, message = self.update_cell_by_lookup(
-                    row_header,
-                    row_value,
-                    col_header,
-                    new_value
-                )
-                success = result
-                
-                # Format result for feedback
-                if success:
-                    message = f"Success: Cell updated successfully. {message}"
+            # Check required parameters
+            if not self._validate_parameters(parameters, _OPERATION_REQUIRED_PARAM_SETS[function_name]):
+                error_feedback = _ERROR_MISSING_PARAMS[function_name]
+                logger.error(error_feedback)
+                return -1, error_feedback
             
-            else:
-                error_msg = f"Unknown function: {function_name}"
-                logger.error(error_msg)
-                return -1, f"Error: {error_msg}"
+            # Process the operation
+            success, feedback = handler(parameters)
             
             # Calculate reward based on success
             reward = 1 if success else -1
             
-            # Format feedback
-            if success:
-                if not message.startswith("Success"):
-                    feedback = f"Success: {message}"
-                else:
-                    feedback = message
-            else:
-                feedback = f"Error: {message}"
-            
             # Log the final result
-            logger.info(f"Operation result: reward={reward}, feedback={feedback}")
+            logger.info("Operation result: reward=%d, feedback=%s", reward, feedback)
             
             return reward, feedback
             
         except Exception as e:
             error_msg = f"Error processing JSON operation: {str(e)}"
             logger.error(error_msg)
-            return -1, f"Error: {error_msg}"
\ No newline at end of file
+            return -1, f"Error: {error_msg}"
+    
+    def process_json_operations(self, json_inputs):
+        """
+        Process a list of JSON-formatted Excel operations in order.
+        
+        Each operation is handled exactly like a process_json_operation() call
+        and sees the effects of the operations before it, but the workbook is
+        saved only once, after the last operation, instead of after every write.
+        
+        Args:
+            json_inputs (list): JSON-formatted operations (str)
+            
+        Returns:
+            list: One (reward, feedback) tuple per operation, in the same order.
+                If the final save fails, every operation that changed the sheet
+                gets (-1, "Error: ...") instead, as process_json_operation() would.
+        """
+        results = []
+        saving_indexes = [] # Operations that would have saved the workbook themselves
+        self._defer_saves = True
+        try:
+            for index, json_input in enumerate(json_inputs):
+                self._save_requested = False
+                results.append(self.process_json_operation(json_input))
+                if self._save_requested:
+                    saving_indexes.append(index)
+        finally:
+            self._defer_saves = False
+        
+        try:
+            self._save()
+        except Exception as e:
+            error_msg = f"Error saving workbook after batch of operations: {str(e)}"
+            logger.error(error_msg)
+            for index in saving_indexes:
+                results[index] = (-1, f"Error: {error_msg}")
+        
+        logger.info("Processed %d JSON operations", len(results))
+        return results
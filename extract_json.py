@@ -1,39 +1,375 @@
 import json
+import mmap
+import os
+import re
 import sys  # To get command-line arguments
+import tempfile
+from functools import partial
+from multiprocessing import Pool
 
-def remove_fields_from_json_file(json_filepath, output_filepath):
+try:
+    import orjson  # Much faster parsing/serialization for large files
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # Streaming parser, picks the yajl2_c C backend when it is available
+except ImportError:
+    ijson = None
+
+FIELDS_TO_REMOVE = frozenset(("response", "excel_row_number")) # Fields stripped from every record
+
+OUTPUT_BUFFER_SIZE = 1 << 20 # 1 MiB output buffer, far fewer write syscalls than the 8 KiB default
+COMPACT_SEPARATORS = (',', ':') # No whitespace at all, the fastest and smallest encoder output
+
+# Encoders built once and reused for every record. check_circular is off because the
+# data always comes straight from a JSON parser and so can never contain cycles.
+INDENTED_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False, indent=2)
+COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=COMPACT_SEPARATORS)
+
+# Patterns used by the splicing path to walk the array elements without decoding them
+JSON_WHITESPACE_PATTERN = re.compile(r'\s*')
+JSON_STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+JSON_MEMBER_KEY_PATTERN = re.compile(r'\s*("(?:[^"\\]|\\.)*")\s*:\s*')
+JSON_SEPARATOR_PATTERN = re.compile(r'\s*([,}\]])')
+JSON_EMPTY_OBJECT_PATTERN = re.compile(r'\{\s*\}')
+REMOVED_KEY_TOKENS = frozenset(json.dumps(field) for field in FIELDS_TO_REMOVE) # Keys as they appear in the file
+
+
+def strip_fields(item):
+    """Removes the fields in FIELDS_TO_REMOVE from one record, in place."""
+    for field in FIELDS_TO_REMOVE:
+        item.pop(field, None)
+
+
+def iter_stripped_items(infile):
+    """
+    Yields the objects of the JSON array in infile one at a time, with the
+    'response' and 'excel_row_number' fields removed.
+
+    Args:
+        infile (file): Input JSON file opened in binary mode.
+    """
+    for item in ijson.items(infile, 'item', use_float=True): # One array element at a time
+        strip_fields(item)
+        yield item
+
+
+def encode_array_element(item, compact=False):
+    """
+    Encodes one object the way json.dumps(..., indent=2, ensure_ascii=False) lays out
+    an element of a top-level array (indented by one level).
+
+    Args:
+        item (dict): The object to encode.
+        compact (bool): Encode without any whitespace instead, like separators=(',', ':').
+    """
+    if compact:
+        return COMPACT_ENCODER.encode(item)
+    item_json_string = INDENTED_ENCODER.encode(item)
+    return "\n".join("  " + line for line in item_json_string.split("\n")) # Nest inside the array
+
+
+def iter_json_array_chunks(items, compact=False):
+    """
+    Yields the text of a JSON array holding items, chunk by chunk, laid out exactly
+    like json.dumps(list(items), indent=2, ensure_ascii=False).
+
+    Args:
+        items (iterable): The objects to encode as array elements.
+        compact (bool): Lay the array out without any whitespace instead.
+    """
+    opener, item_separator, closer = ("[", ",", "]") if compact else ("[\n", ",\n", "\n]")
+    separator = opener
+    for item in items:
+        yield separator
+        yield encode_array_element(item, compact)
+        separator = item_separator
+    yield "[]" if separator == opener else closer # Close JSON array
+
+
+def strip_and_encode_chunk(items, compact=False):
+    """
+    Worker function for the multiprocessing path: removes the fields from a chunk of
+    items and returns the encoded array elements joined by ",\n" (or "," when compact).
+
+    Args:
+        items (list): A slice of the input array.
+        compact (bool): Encode without any whitespace.
+    """
+    for item in items:
+        strip_fields(item)
+    item_separator = "," if compact else ",\n"
+    return item_separator.join(encode_array_element(item, compact) for item in items)
+
+
+def stream_remove_fields_from_json_file(json_filepath, output_filepath, compact=False):
+    """
+    Streaming version of remove_fields_from_json_file built on ijson.
+
+    Parsing, field removal and writing are fused into a single generator pipeline, so
+    each record is handled once and memory use stays bounded by the size of a single
+    record instead of the whole file. The output is identical to json.dumps(data, indent=2).
+
+    Args:
+        json_filepath (str): The path to the input JSON file.
+        output_filepath (str): The path to the output JSON file where modified data will be saved.
+        compact (bool): Write the JSON without any whitespace instead of indented.
+
+    Returns:
+        bool: False when the file holds an integer too large for the ijson backend and
+            has to be processed by loading the whole document instead, True otherwise.
+    """
+    try:
+        infile = open(json_filepath, 'rb') # ijson reads raw UTF-8 bytes
+    except FileNotFoundError:
+        print(f"Error: Input file not found at path: {json_filepath}")
+        return True
+
+    temp_filepath = None
+    try:
+        with infile:
+            # ijson.items(..., 'item') silently matches nothing when the top-level value is not an array
+            _, first_event, _ = next(ijson.parse(infile))
+            if first_event != 'start_array':
+                print(f"Error: Top-level JSON value is not an array in file: {json_filepath}")
+                return True
+            infile.seek(0)
+            # The input is only fully parsed once the last record is written, so write to a temporary
+            # file next to the output and move it into place at the end. Invalid input then never
+            # leaves a half-written output file behind.
+            with tempfile.NamedTemporaryFile('w', buffering=OUTPUT_BUFFER_SIZE, encoding='utf-8', suffix='.tmp',
+                                             dir=os.path.dirname(os.path.abspath(output_filepath)), delete=False) as outfile:
+                temp_filepath = outfile.name
+                outfile.writelines(iter_json_array_chunks(iter_stripped_items(infile), compact))
+            os.replace(temp_filepath, output_filepath)
+            temp_filepath = None
+        print(f"Modified JSON data saved to: {output_filepath}")
+    except ijson.JSONError as e:
+        if "integer overflow" in str(e): # The yajl2 backends only handle integers that fit in 64 bits
+            print("Note: The input holds an integer too large for the streaming parser, loading the whole document instead.")
+            return False
+        print(f"Error: Invalid JSON format in file: {json_filepath}")
+        print(f"JSONError details: {e}") # Print detailed error message
+    except Exception as e:
+        print(f"Error: Failed to write to output file: {output_filepath}")
+        print(f"Error details: {e}")
+    finally:
+        if temp_filepath is not None:
+            os.unlink(temp_filepath)
+    return True
+
+
+def skip_json_value(text, pos, decoder=json.JSONDecoder()):
+    """
+    Returns the position just after the JSON value starting at text[pos]. Strings are
+    skipped with a regex, so even very long values are never decoded.
+    """
+    if text.startswith('"', pos):
+        string_match = JSON_STRING_PATTERN.match(text, pos)
+        if string_match is None:
+            raise ValueError(f"Unterminated string starting at position {pos}")
+        return string_match.end()
+    return decoder.raw_decode(text, pos)[1]
+
+
+def match_json_separator(text, pos):
+    """Returns the match of the ',', '}' or ']' that follows a value ending at text[pos]."""
+    separator_match = JSON_SEPARATOR_PATTERN.match(text, pos)
+    if separator_match is None:
+        raise ValueError(f"Expected ',' or closing bracket at position {pos}")
+    return separator_match
+
+
+def iter_spliced_ranges(text):
+    """
+    Yields the (start, end) ranges of text to keep so that the 'response' and
+    'excel_row_number' members of every object in the top-level array are cut out,
+    together with their separating comma. Everything else is kept character for character.
+
+    Args:
+        text (str): The content of the input JSON file.
+    """
+    keep_from = 0
+    pos = JSON_WHITESPACE_PATTERN.match(text).end()
+    if not text.startswith('[', pos):
+        raise ValueError("Top-level JSON value is not an array")
+    pos += 1
+
+    while True:
+        pos = JSON_WHITESPACE_PATTERN.match(text, pos).end()
+        if text.startswith(']', pos): # Empty array
+            break
+
+        if text.startswith('{', pos) and not JSON_EMPTY_OBJECT_PATTERN.match(text, pos):
+            pos += 1
+            last_comma = None # Comma before the current member
+            cut_start = None # Start of the run of members being removed
+            comma_before_cut = None
+            while True:
+                key_match = JSON_MEMBER_KEY_PATTERN.match(text, pos)
+                if key_match is None:
+                    raise ValueError(f"Expected object key at position {pos}")
+                key_start = key_match.start(1)
+                value_end = skip_json_value(text, key_match.end())
+                separator_match = match_json_separator(text, value_end)
+
+                if key_match.group(1) in REMOVED_KEY_TOKENS:
+                    if cut_start is None:
+                        cut_start = key_start
+                        comma_before_cut = last_comma
+                elif cut_start is not None: # First kept member after a removed run
+                    yield keep_from, cut_start
+                    keep_from = key_start
+                    cut_start = None
+
+                pos = separator_match.end()
+                if separator_match.group(1) == ',':
+                    last_comma = separator_match.start(1)
+                elif separator_match.group(1) == '}':
+                    if cut_start is not None: # Removed run reaches the end of the object
+                        yield keep_from, comma_before_cut if comma_before_cut is not None else cut_start
+                        keep_from = value_end
+                    break
+                else:
+                    raise ValueError(f"Unexpected ']' at position {separator_match.start(1)}")
+        else: # Not an object (or an empty one), keep as is
+            pos = skip_json_value(text, pos)
+
+        separator_match = match_json_separator(text, pos)
+        pos = separator_match.end()
+        if separator_match.group(1) == ']':
+            break
+        if separator_match.group(1) != ',':
+            raise ValueError(f"Unexpected '}}' at position {separator_match.start(1)}")
+
+    yield keep_from, len(text)
+
+
+def splice_remove_fields_from_json_file(json_filepath, output_filepath):
+    """
+    Removes the 'response' and 'excel_row_number' fields by splicing their text ranges out
+    of the memory-mapped input file, without building Python objects for the records or
+    decoding the (long) removed string values.
+
+    The kept text is copied verbatim, so the output keeps the formatting of the input file
+    (instead of being re-indented like the other paths). The structure of the array and its
+    objects is checked while walking it, but kept values are not fully validated.
+
+    Args:
+        json_filepath (str): The path to the input JSON file.
+        output_filepath (str): The path to the output JSON file where modified data will be saved.
+    """
+    try:
+        infile = open(json_filepath, 'rb')
+    except FileNotFoundError:
+        print(f"Error: Input file not found at path: {json_filepath}")
+        return
+
+    try:
+        with infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            text = str(buf, 'utf-8') # Decoded straight from the mapped pages, no intermediate read buffer
+        ranges = list(iter_spliced_ranges(text))
+    except ValueError as e: # Also raised by mmap for empty files
+        print(f"Error: Invalid JSON format in file: {json_filepath}")
+        print(f"Error details: {e}")
+        return
+
+    try:
+        with open(output_filepath, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as outfile:
+            outfile.writelines(text[start:end] for start, end in ranges)
+        print(f"Modified JSON data saved to: {output_filepath}")
+    except Exception as e:
+        print(f"Error: Failed to write to output file: {output_filepath}")
+        print(f"Error details: {e}")
+
+
+def load_mapped_json_file(f):
+    """
+    Parses a JSON file with orjson directly from a read-only memory map of the file,
+    so the whole file is never copied into an intermediate bytes object.
+
+    Args:
+        f (file): The input JSON file opened in binary mode.
+    """
+    if os.fstat(f.fileno()).st_size == 0: # mmap cannot map empty files, let orjson report the error
+        return orjson.loads(b"")
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf, memoryview(buf) as view:
+        return orjson.loads(view) # orjson accepts memoryview but not mmap objects
+
+
+def remove_fields_from_json_file(json_filepath, output_filepath, workers=1, compact=False):
     """
     Loads JSON data from a file, removes 'response' and 'excel_row_number' fields
     from each object in the array, and saves the modified JSON to a new file.
 
+    Streams the file with ijson when it is installed. Otherwise the whole document is loaded,
+    using orjson when it is installed and the standard json module as a last resort.
+    Files holding integers too large for the streaming parser are loaded with the standard
+    json module, which keeps them exact.
+    With workers > 1 the whole document is loaded and the records are stripped and
+    re-encoded in chunks by a pool of worker processes.
+
     Args:
         json_filepath (str): The path to the input JSON file.
         output_filepath (str): The path to the output JSON file where modified data will be saved.
+        workers (int): Number of worker processes used to strip and encode the records.
+        compact (bool): Write the JSON without any whitespace instead of indented with 2 spaces.
+            Smaller output and faster encoding, for files that are only read by programs.
     """
+    use_orjson = orjson is not None
+    if ijson is not None and workers <= 1:
+        if stream_remove_fields_from_json_file(json_filepath, output_filepath, compact):
+            return
+        use_orjson = False # orjson would turn the too large integers into floats
+
     try:
-        with open(json_filepath, 'r', encoding='utf-8') as f: # Open input file in read mode, specify encoding for Hebrew
-            data = json.load(f) # Load JSON data from the file
+        if use_orjson:
+            with open(json_filepath, 'rb') as f: # orjson works on raw UTF-8 bytes
+                data = load_mapped_json_file(f) # Parse straight from the mapped pages
+        else:
+            with open(json_filepath, 'r', encoding='utf-8') as f: # Open input file in read mode, specify encoding for Hebrew
+                data = json.load(f) # Load JSON data from the file
     except FileNotFoundError:
         print(f"Error: Input file not found at path: {json_filepath}")
         return
-    except json.JSONDecodeError as e:
+    except json.JSONDecodeError as e: # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
         print(f"Error: Invalid JSON format in file: {json_filepath}")
         print(f"JSONDecodeError details: {e}") # Print detailed error message
         return
 
-    modified_data = []
-    for item in data:
-        modified_item = {}
-        for key, value in item.items():
-            if key not in ["response", "excel_row_number"]:
-                modified_item[key] = value
-        modified_data.append(modified_item)
+    if workers > 1 and len(data) > 1:
+        try:
+            chunk_size = -(-len(data) // (workers * 4)) # A few chunks per worker to even out the load
+            chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+            with Pool(workers) as pool:
+                encoded_chunks = pool.map(partial(strip_and_encode_chunk, compact=compact), chunks)
+            with open(output_filepath, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as outfile:
+                if compact:
+                    outfile.write("[" + ",".join(encoded_chunks) + "]")
+                else:
+                    outfile.write("[\n")
+                    outfile.write(",\n".join(encoded_chunks))
+                    outfile.write("\n]") # Same layout as json.dumps(data, indent=2)
+            print(f"Modified JSON data saved to: {output_filepath}")
+        except Exception as e:
+            print(f"Error: Failed to write to output file: {output_filepath}")
+            print(f"Error details: {e}")
+        return
 
-    modified_json_string = json.dumps(modified_data, indent=2, ensure_ascii=False)
+    for item in data: # Remove the fields in place instead of copying every item
+        strip_fields(item)
 
     try:
-        with open(output_filepath, 'w', encoding='utf-8') as outfile: # Open output file in write mode, specify encoding
-            outfile.write(modified_json_string) # Write the modified JSON string to the output file
+        if use_orjson:
+            modified_json_bytes = orjson.dumps(data, option=None if compact else orjson.OPT_INDENT_2) # orjson always emits UTF-8, Hebrew is kept as-is
+            with open(output_filepath, 'wb', buffering=OUTPUT_BUFFER_SIZE) as outfile: # Open output file in binary write mode
+                outfile.write(modified_json_bytes) # Write the modified JSON bytes to the output file
+        else:
+            encoder = COMPACT_ENCODER if compact else INDENTED_ENCODER
+            modified_json_bytes = encoder.encode(data).encode('utf-8')
+            with open(output_filepath, 'wb', buffering=OUTPUT_BUFFER_SIZE) as outfile: # Binary mode, the bytes go out in one large write
+                outfile.write(modified_json_bytes) # Write the modified JSON bytes to the output file
         print(f"Modified JSON data saved to: {output_filepath}")
     except Exception as e:
         print(f"Error: Failed to write to output file: {output_filepath}")
@@ -43,13 +379,36 @@ def remove_fields_from_json_file(json_filepath, output_filepath):
 if __name__ == "__main__":
     input_json_file = "gemini_raw_responses.json" # Default input filename
     output_json_file = "modified_gemini_responses.json" # Default output filename
+    workers = 1 # Default to a single process
+
+    args = sys.argv[1:]
+    splice = '--splice' in args # Optional byte-splicing mode, keeps the input formatting
+    if splice:
+        args.remove('--splice')
+    compact = '--compact' in args # Optional whitespace-free output for machine consumers
+    if compact:
+        if splice:
+            print("Error: --compact cannot be combined with --splice, which keeps the input formatting.")
+            sys.exit(1)
+        args.remove('--compact')
+    if '--workers' in args: # Optional number of worker processes for large arrays
+        workers_index = args.index('--workers')
+        try:
+            workers = int(args[workers_index + 1])
+        except (IndexError, ValueError):
+            print("Error: --workers option requires a number.")
+            sys.exit(1)
+        del args[workers_index:workers_index + 2]
 
-    if len(sys.argv) > 1:
-        input_json_file = sys.argv[1] # Get input filename from command line argument
-    if len(sys.argv) > 2:
-        output_json_file = sys.argv[2] # Get output filename from command line argument
+    if len(args) > 0:
+        input_json_file = args[0] # Get input filename from command line argument
+    if len(args) > 1:
+        output_json_file = args[1] # Get output filename from command line argument
 
     print(f"Processing input file: {input_json_file}")
     print(f"Saving output to file: {output_json_file}")
 
-    remove_fields_from_json_file(input_json_file, output_json_file)
\ No newline at end of file
+    if splice:
+        splice_remove_fields_from_json_file(input_json_file, output_json_file)
+    else:
+        remove_fields_from_json_file(input_json_file, output_json_file, workers, compact)
\ No newline at end of file
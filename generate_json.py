@@ -13,61 +13,508 @@ in this file to keep it focused.
 
 The prompt encourages Gemini to generate more varied and human-like Hebrew instructions.
 
+Rows are sent to Gemini concurrently with asyncio: a small pool of workers pulls rows in order and keeps
+up to --concurrency requests in flight, since the job is bound by network latency, not CPU. A shared
+token-bucket rate limiter keeps the requests under the requests-per-minute and tokens-per-minute quotas.
+With --rows_per_request, several rows are packed into one request that returns a JSON array, which
+amortizes the per-request overhead for these short prompts.
+
+Examples are written to a JSON Lines file as they complete, in row order, so a crash keeps everything
+generated so far, and --resume continues such a run where it stopped. The main .json file then only
+holds the generation summary, unless --emit_legacy_json asks for the full dataset in the original
+single-file shape.
+
 Usage:
-    python generate_json_from_excel_gemini_humanlike_prompt.py <excel_file_path> [--start_row <row_number>]
+    python generate_json_from_excel_gemini_humanlike_prompt.py <excel_file_path> [--start_row <row_number>] [--concurrency <n>] [--rpm <n>] [--tpm <n>] [--cache_file <path>] [--no_cache] [--no_fallback] [--rows_per_request <n>] [--emit_legacy_json] [--verbose] [--resume]
 
 Options:
     --start_row <row_number>  Row number to start processing from (default is 1, the second row in Excel after headers).
+    --concurrency <n>         Maximum number of Gemini requests in flight at once (default is 8).
+    --rpm <n>                 Maximum Gemini requests per minute (default is 90, 10% under a 100 RPM quota).
+    --tpm <n>                 Maximum estimated Gemini tokens per minute (default is 27000, 10% under a 30K TPM quota).
+    --cache_file <path>       SQLite file caching Gemini responses by prompt (default is gemini_response_cache.sqlite next to the script).
+    --no_cache                Always query Gemini, without reading or writing the response cache.
+    --no_fallback             Do not retry rows with invalid output on the stronger fallback model (gemini-1.5-pro-latest).
+    --rows_per_request <n>    Rows sent to Gemini in a single request (default is 1). Batches whose reply does not hold
+                              exactly one object per row are split in half and sent again, down to single rows.
+    --emit_legacy_json        Also rebuild the full dataset (summary, generated_examples, error_examples) into the main
+                              .json file from the JSON Lines file, for consumers of the single-file format.
+    --verbose                 Print the per-row messages instead of a progress bar. Warnings and errors are
+                              written to gemini_errors.log either way.
+    --resume                  Continue an interrupted run (started with the same arguments): keep the examples already
+                              in the JSON Lines file, skip their rows and append the rest.
 
 Requirements:
     - Python 3.6+
     - pandas
     - faker
     - openpyxl (for .xlsx) or xlrd (for .xls)
+    - pyarrow (only for .parquet input)
     - google-generativeai
     - python-dotenv (pip install python-dotenv)
+    - tqdm (optional, for the progress bar)
+    - python-calamine (optional, much faster Excel reading)
 """
 
+import asyncio  # Concurrent Gemini requests
+import hashlib
 import json
+import logging
 import random
 import os
+import sqlite3 # Persistent response cache
 import sys
 import time  # Import time for rate limiting
-from datetime import datetime, timedelta
+import traceback
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
 from faker import Faker # Still import Faker, might be used for fallback or other purposes later
 import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from google.generativeai import types # Although types might not be directly used here, keep for potential future use or if Client expects it indirectly
 from dotenv import load_dotenv  # Import load_dotenv
 import re # Import regular expression library
 
+try:
+    import orjson  # Much faster encoding/decoding of the Hebrew JSON records
+except ImportError:
+    orjson = None
+
+try:
+    from python_calamine import CalamineWorkbook  # Optional, Rust-based Excel reader, much faster than openpyxl
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    from tqdm import tqdm  # Optional, single-line progress bar instead of per-row output
+except ImportError:
+    tqdm = None
+
 # Load environment variables from .env file
 load_dotenv()
 
 fake = Faker() # Initialize Faker, potentially for future use
 
+# Per-row progress, warnings and errors. Configured in main: warnings and errors always go to a log file,
+# the console shows a progress bar instead, unless --verbose (or missing tqdm) asks for the per-row messages.
+logger = logging.getLogger('generate_json')
+
+# Consider trying different models if 'flash' is too basic or repetitive
+GEMINI_MODEL_NAME = 'gemini-1.5-flash' # Stick with flash for now if preferred
+FALLBACK_MODEL_NAME = 'gemini-1.5-pro-latest' # Potentially better at complex instructions, used for rows flash gets wrong
+gemini_models = {} # model name -> GenerativeModel, each created once, on first use, by get_gemini_model()
+routing_stats = {"fallback_attempts": 0, "fallback_successes": 0} # Rows retried on the fallback model
+duplicate_stats = {"duplicate_rows": 0} # Rows that reused the result of an identical earlier row
+
+DEFAULT_CONCURRENCY = 8 # Gemini requests in flight at once
+DEFAULT_RPM_LIMIT = 90 # Requests per minute, 10% safety margin under a 100 RPM quota
+DEFAULT_TPM_LIMIT = 27000 # Tokens per minute, 10% safety margin under a 30K TPM quota
+CHARS_PER_TOKEN = 4 # Rough prompt size estimate, avoids a count_tokens round trip per row
+EXPECTED_OUTPUT_TOKENS = 300 # Typical size of the generated instruction + JSON
+DEFAULT_ROWS_PER_REQUEST = 1 # Rows packed into one Gemini request
+BATCH_MAX_WAIT_SECONDS = 0.5 # A batch that is not full yet is sent this long after its first row arrived
+OUTPUT_BUFFER_SIZE = 1 << 20 # 1 MiB buffer for the JSON Lines files, far fewer write syscalls than the 8 KiB default
+FLUSH_EVERY_ROWS = 25 # Flush the JSON Lines files after this many written rows, bounding what a hard kill can lose
+
+# Retry policy for rate limits (429), transient server errors and network errors
+MAX_API_ATTEMPTS = 4
+RETRY_INITIAL_DELAY_SECONDS = 2
+RETRY_MAX_DELAY_SECONDS = 60
+RETRYABLE_API_ERRORS = (
+    google_exceptions.ResourceExhausted, # 429
+    google_exceptions.ServiceUnavailable, # 503
+    google_exceptions.InternalServerError, # 500
+    google_exceptions.DeadlineExceeded, # 504
+    ConnectionError,
+    TimeoutError,
+)
+MAX_RATE_REDUCTION = 16 # Rate limit errors slow requests down to at most 1/16 of --rpm
+retry_jitter = random.Random() # Separate generator, so retries don't change the column choices of the global one
+
+# JSON mode schema: Gemini returns exactly one object of this shape, without markdown fences
+FUNCTION_CALL_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "instruction": {"type": "string"},
+        "function_name": {"type": "string"},
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "row_header": {"type": "string"},
+                "row_value": {"type": "string"},
+                "col_header": {"type": "string"},
+                "new_value": {"type": "string"},
+            },
+            "required": ["row_header", "row_value", "col_header", "new_value"],
+        },
+    },
+    "required": ["instruction", "function_name", "parameters"],
+}
+# Same, for requests holding several rows: one object per row, in row order
+BATCH_RESPONSE_SCHEMA = {"type": "array", "items": FUNCTION_CALL_RESPONSE_SCHEMA}
+
+# ----- ***** REFINED PROMPT TEXT ***** -----
+# Static part of the prompt, the same for every row. Sent once per request as the model's system instruction,
+# which keeps it out of the per-row prompt and lets Gemini cache it between requests.
+SYSTEM_PROMPT = """
+You are an expert in generating realistic, human-like instructions for updating Excel sheets in Hebrew.
+Your goal is to create varied and natural-sounding requests.
+
+For each request you get the context from an Excel row: the available column headers, the project name,
+the column to update, its current value and the full row data. Perform the following tasks:
+1. Decide on a relevant *new* value for the column to update, related to the project and considering all the row data.
+2. Generate a natural language instruction *in Hebrew* telling someone to make this update.
+3. Generate a JSON object representing a function call to 'excel_update_cell_by_lookup' to execute the update.
+
+**Instructions for the Hebrew Instruction (Task 2):**
+- **Variety is key!** Phrase the instruction as a real person might ask a colleague. Use different sentence structures: direct commands, questions, polite requests, statements about what needs doing.
+- **Refer to the project, column, and values naturally.** Don't just repeat the names rigidly. Examples (with [project], [column] and [current value] standing for the real ones): "לגבי [project], צריך לשנות את ה[column] ל...", "אפשר לעדכן בבקשה את הסטטוס של הפרויקט הזה?", "הערך הנוכחי ([current value]) בעמודה [column] לא נכון, שנה ל...", "מה הסטטוס החדש של [project]?".
+- **CRITICAL: Avoid consistently putting project names, column names, or values inside single quotes (' ') in the instruction text.** Use quotes only if they are truly natural in Hebrew for emphasis in that specific context, which should be rare. Refer to things directly by name or description.
+- Minor, realistic-sounding grammatical quirks or informalities are okay if they sound natural, but the instruction must be clear.
+
+**Instructions for the JSON Object (Task 3):**
+- Generate a JSON object in *exactly* this format:
+```json
+{
+  "function_name": "excel_update_cell_by_lookup",
+  "parameters": {
+    "row_header": "שם הפרויקט",
+    "row_value": "<project_name_in_hebrew>",
+    "col_header": "<special_column_header_in_hebrew>",
+    "new_value": "<new_value_in_hebrew>"
+  }
+}
+```
+- Ensure:
+    a) The `instruction` key holds the Hebrew instruction generated in Task 2.
+    b) All JSON string values (`row_value`, `col_header`, `new_value`) are in Hebrew. Note: These JSON *values* must be strings, even if the instruction doesn't use quotes.
+    c) Output *only* the complete JSON object. Do not include any other text before or after it.
+
+Example of desired JSON output structure (the instruction text itself should vary greatly based on the rules above):
+```json
+{
+  "instruction": "בפרויקט [project] צריך לעדכן את [column] שיהיה [ערך חדש]", // Natural phrasing, replace placeholders
+  "function_name": "excel_update_cell_by_lookup",
+  "parameters": {
+    "row_header": "שם הפרויקט",
+    "row_value": "שם פרויקט לדוגמה", // Value is a string
+    "col_header": "כותרת עמודה לדוגמה", // Value is a string
+    "new_value": "ערך חדש לדוגמה" // Value is a string
+  }
+}
+```
+"""
+
+# Row-specific part of the prompt, filled in with str.format for every row
+ROW_PROMPT_TEMPLATE = """
+Here is the context from an Excel row:
+**Available Excel Column Headers:** [{headers_text}]
+**Project Name:** {project_name}
+**Column to Update:** {special_column_header}
+**Current Value in '{special_column_header}' column:** {current_value}
+**Full Row Data:**
+{row_data_text}
+
+Update the '{special_column_header}' column of the project "{project_name}".
+"""
+
+# Wraps the row prompts of a batch, so one request covers several rows
+BATCH_PROMPT_TEMPLATE = """
+Here are {row_count} separate requests, each with the context from a different Excel row.
+Handle every request on its own, following the rules above, and output a JSON array with exactly {row_count}
+objects, one per request, in the same order as the requests.
+{row_prompts}
+"""
+# ----- ***** END OF REFINED PROMPT TEXT ***** -----
+
+# Last-resort regex to find JSON block ```json ... ``` or just { ... } when no complete object can be decoded,
+# compiled once instead of per response
+JSON_BLOCK_PATTERN = re.compile(r'```json\s*(\{[\s\S]*?\})\s*```|(\{[\s\S]*?\})', re.IGNORECASE)
+JSON_DECODER = json.JSONDecoder() # For raw_decode, which reads one value and reports where it ends
+
+def find_json_object_text(text):
+    """
+    Returns the text of the first complete JSON object in text, e.g. inside a ```json fence or surrounded by prose,
+    or None if there is none. Each candidate '{' is decoded with the C-accelerated raw_decode, which follows
+    nesting and string literals in a single pass, unlike a lazy regex that stops at the first '}'.
+    """
+    start = text.find('{')
+    while start != -1:
+        try:
+            _, end = JSON_DECODER.raw_decode(text, start)
+            return text[start:end]
+        except json.JSONDecodeError:
+            start = text.find('{', start + 1)
+    return None
+
+
 # This function seems unused in the current flow, but kept for potential future utility
 def get_excel_cell_address_from_pandas(row_index, col_index):
     """Convert pandas 0-based indices to Excel cell address (A1, B2, etc.)"""
-    col_letters = ""
-    col_idx_excel = col_index + 1
-    while col_idx_excel > 0:
-        col_idx_excel, remainder = divmod(col_idx_excel - 1, 26)
-        col_letters = chr(65 + remainder) + col_letters
-    return f"{col_letters}{row_index + 2}"
+    return f"{get_column_letter(col_index + 1)}{row_index + 2}" # openpyxl looks the letters up in a precomputed table
 
 
-# No need to re-import genai here if already imported above
-# from google import genai
+class TokenBucket:
+    """
+    Asyncio token bucket: holds up to `capacity` units and refills continuously at
+    `capacity` units per `period` seconds. Waiters are served in arrival order.
+    """
 
-# ... (Keep all imports and other functions as they are) ...
+    def __init__(self, capacity, period=60.0):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.level = capacity
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity) # A single oversized request must still be able to go through
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.level = min(self.capacity, self.level + (now - self.last_refill) * self.refill_rate)
+                self.last_refill = now
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.refill_rate)
+
+
+class GeminiRateLimiter:
+    """
+    Keeps Gemini calls under both a requests-per-minute and a tokens-per-minute limit.
+    The request rate adapts to the quota actually available: it is halved on every rate limit (429)
+    error and grows back by one request per minute with every successful call.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_request_rate = self.request_bucket.refill_rate
+        self.min_request_rate = self.max_request_rate / MAX_RATE_REDUCTION
+
+    def slow_down(self):
+        """Halves the request rate and drops the saved-up burst, so the next requests are spaced out right away."""
+        self.request_bucket.refill_rate = max(self.min_request_rate, self.request_bucket.refill_rate / 2)
+        self.request_bucket.level = 0
+        return self.request_bucket.refill_rate * 60
+
+    def speed_up(self):
+        self.request_bucket.refill_rate = min(self.max_request_rate, self.request_bucket.refill_rate + 1 / 60)
 
-def generate_instruction_and_json_with_gemini(project_name, special_column_header, current_value, excel_row_number, raw_response_file, row_data, headers_list):
+    async def wait(self, prompt_text, response_count=1):
+        estimated_tokens = (len(SYSTEM_PROMPT) + len(prompt_text)) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS * response_count
+        await self.request_bucket.acquire()
+        await self.token_bucket.acquire(estimated_tokens)
+
+
+class ResponseCache:
     """
-    Generates a Hebrew instruction and JSON function call using Gemini API (compatible method)
-    with robust JSON extraction, saves parsed response details, and includes row data/headers in prompt.
-    The prompt encourages more human-like and varied Hebrew instructions, avoiding repetitive quoting.
+    Persistent Gemini response cache stored in a SQLite file, keyed by a hash of the model name and the full
+    prompt (system instruction + row prompt).
+    Only outputs that produced a valid function call JSON are stored, so failed rows are queried again on the next run.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, output TEXT NOT NULL)")
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(model_name, prompt_text):
+        return hashlib.blake2b(f"{model_name}\n{prompt_text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, model_name, prompt_text):
+        row = self.connection.execute(
+            "SELECT output FROM responses WHERE key = ?", (self.make_key(model_name, prompt_text),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, model_name, prompt_text, output):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, output) VALUES (?, ?)", (self.make_key(model_name, prompt_text), output)
+        )
+        self.connection.commit() # Commit right away, so a crash keeps everything fetched so far
+
+    def close(self):
+        self.connection.close()
+
+
+def dumps_json(obj, indent=False):
+    """
+    Encodes obj as JSON text with non-ASCII (Hebrew) characters kept as-is, compact unless indent is set.
+    Uses orjson when it is installed and the standard json module otherwise.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0) # Headers may be numbers or None
+        return orjson.dumps(obj, option=option).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def loads_json(text):
+    """Decodes JSON text with orjson when it is installed. Both raise a json.JSONDecodeError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(text) # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+    return json.loads(text)
+
+
+def write_raw_record(raw_response_file, record):
+    """
+    Appends one record to the parsed response details file as a single JSON Lines (NDJSON) line.
+    Records are independent lines, so the file needs no closing bracket and stays valid if the run stops early.
+    """
+    raw_response_file.write(dumps_json(record) + "\n")
+
+
+def normalize_calamine_value(value):
+    """
+    Converts a python-calamine cell value to what openpyxl returns for the same cell, so prompts (and their
+    cache keys) do not depend on the reader: None for empty cells, int for whole numbers, datetime for dates.
+    """
+    if value == "":
+        return None
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is date:
+        return datetime.combine(value, datetime.min.time())
+    return value
+
+
+def read_excel_rows(excel_file_path):
     """
+    Reads the header row of the first sheet and returns (headers_list, rows), where rows lazily yields
+    one {header: value} dict per data row, with None for empty cells.
+
+    When python-calamine is installed, every format it supports is streamed with it. Otherwise .xlsx files
+    are streamed with openpyxl in read-only mode, so the sheet is never loaded into memory as a whole, and
+    other formats (e.g. .xls) are read with pandas. Parquet files (such as the projects_data.parquet written
+    by generate_xlsx.py) are always read with pandas. As with pandas, fully empty rows at the end of the
+    sheet are dropped.
+    """
+    is_parquet = excel_file_path.endswith('.parquet')
+    if CalamineWorkbook is not None and not is_parquet:
+        workbook = CalamineWorkbook.from_path(excel_file_path)
+        sheet = workbook.get_sheet_by_index(0)
+        leading_cells = (None,) * (sheet.start[1] if sheet.start else 0) # calamine skips empty leading columns, openpyxl does not
+        sheet_rows = (leading_cells + tuple(map(normalize_calamine_value, values)) for values in sheet.iter_rows())
+        close_workbook = workbook.close
+    elif is_parquet or not excel_file_path.endswith('.xlsx'):
+        df = pd.read_parquet(excel_file_path) if is_parquet else pd.read_excel(excel_file_path)
+        df = df.astype(object).where(pd.notna(df), None) # NaN -> None, like empty cells in the openpyxl path
+        return list(df.columns), iter(df.to_dict(orient='records'))
+    else:
+        workbook = load_workbook(excel_file_path, read_only=True, data_only=True)
+        sheet_rows = workbook.active.iter_rows(values_only=True)
+        close_workbook = workbook.close
+
+    header_values = next(sheet_rows, None)
+    if header_values is None:
+        close_workbook()
+        raise pd.errors.EmptyDataError("No header row found")
+
+    headers_list = list(header_values)
+    while headers_list and headers_list[-1] is None: # Drop unused trailing columns
+        headers_list.pop()
+    column_count = len(headers_list)
+
+    def rows():
+        try:
+            blank_rows = [] # Only yielded once a non-empty row follows them
+            for values in sheet_rows:
+                if len(values) < column_count:
+                    values = values + (None,) * (column_count - len(values))
+                row_data = dict(zip(headers_list, values))
+                if all(value is None for value in values):
+                    blank_rows.append(row_data)
+                    continue
+                yield from blank_rows
+                blank_rows = []
+                yield row_data
+        finally:
+            close_workbook()
+
+    return headers_list, rows()
+
+
+def make_row_data_template(headers_list):
+    """
+    Builds the "- header: value" lines of the row prompt as a str.format template with one positional field
+    per header, so the constant header labels are formatted once per sheet instead of once per row.
+    """
+    return "\n".join(
+        f"- {str(header).replace('{', '{{').replace('}', '}}')}: {{{index}}}" for index, header in enumerate(headers_list)
+    )
+
+
+def get_int_option(argv, option, default, minimum):
+    """Reads `option <n>` from argv, returning default when absent. Exits on invalid values."""
+    if option not in argv:
+        return default
+    value_index = argv.index(option) + 1
+    try:
+        if value_index >= len(argv):
+            raise ValueError(f"{option} option requires a number.")
+        value = int(argv[value_index])
+    except ValueError as e:
+        print(f"Error: Invalid {option} argument. {e}")
+        sys.exit(1)
+    if value < minimum:
+        print(f"Warning: {option} cannot be less than {minimum}. Setting to {minimum}.")
+        value = minimum
+    return value
+
+
+def get_retry_after_seconds(error):
+    """Returns the server's Retry-After delay for an API error, or None if it did not send one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def generate_content_with_retries(model, prompt_text, excel_row_number, rate_limiter=None, response_count=1):
+    """
+    Calls model.generate_content_async, retrying rate limit, transient server and network errors
+    with exponential backoff plus jitter (or the server's Retry-After delay when it sends one).
+    Every attempt waits for the rate limiter, which slows down on rate limit errors and speeds back up
+    on successful calls. Other errors, and the last failed attempt, are raised.
+    """
+    for attempt in range(1, MAX_API_ATTEMPTS + 1):
+        if rate_limiter is not None:
+            await rate_limiter.wait(prompt_text, response_count) # Wait for request and token budget
+        try:
+            response = await model.generate_content_async(contents=[prompt_text])
+        except RETRYABLE_API_ERRORS as e:
+            if rate_limiter is not None and isinstance(e, google_exceptions.ResourceExhausted):
+                requests_per_minute = rate_limiter.slow_down()
+                logger.warning("  🐢 Rate limited by Gemini, slowing down to %.1f requests/min.", requests_per_minute)
+            if attempt == MAX_API_ATTEMPTS:
+                raise
+            delay = get_retry_after_seconds(e)
+            if delay is None:
+                delay = min(RETRY_MAX_DELAY_SECONDS, RETRY_INITIAL_DELAY_SECONDS * 2 ** (attempt - 1)) + retry_jitter.uniform(0, 1)
+            logger.warning("  🔁 Gemini API error for row %s (%s: %s). Retrying in %.1f seconds (attempt %s/%s)...", excel_row_number, type(e).__name__, e, delay, attempt + 1, MAX_API_ATTEMPTS)
+            await asyncio.sleep(delay)
+        else:
+            if rate_limiter is not None:
+                rate_limiter.speed_up()
+            return response
+
+
+def get_gemini_model(model_name=GEMINI_MODEL_NAME, batched=False):
+    """
+    Configures the Gemini API and creates the GenerativeModel on first use, then returns that same
+    instance for every row instead of re-configuring the client on each call.
+    With batched=True, the model answers with a JSON array of function calls instead of a single one.
+    """
+    if (model_name, batched) in gemini_models:
+        return gemini_models[model_name, batched]
+
     gemini_api_key = os.environ.get("GEMINI_API_KEY")
     if not gemini_api_key:
         raise EnvironmentError("GEMINI_API_KEY environment variable not set. Ensure GEMINI_API_KEY is in your .env file or environment variables.")
@@ -75,100 +522,160 @@ def generate_instruction_and_json_with_gemini(project_name, special_column_heade
     # **API Initialization (compatible method)**
     try:
         genai.configure(api_key=gemini_api_key)
-        # Consider trying different models if 'flash' is too basic or repetitive
-        # model_name = 'gemini-1.5-pro-latest' # Potentially better at complex instructions
-        model_name = 'gemini-1.5-flash' # Stick with flash for now if preferred
-        model = genai.GenerativeModel(model_name)
+        # safety_settings={'HARASSMENT': 'BLOCK_NONE', 'HATE_SPEECH': 'BLOCK_NONE', 'SEXUAL': 'BLOCK_NONE', 'DANGEROUS': 'BLOCK_NONE'} # Pass to GenerativeModel if needed
+        generation_config = genai.types.GenerationConfig(
+            # temperature=0.9 # Increase temperature for more creativity/variation if needed (e.g., 0.7 to 1.0)
+            response_mime_type="application/json", # JSON mode: a bare, parseable JSON object
+            response_schema=BATCH_RESPONSE_SCHEMA if batched else FUNCTION_CALL_RESPONSE_SCHEMA
+        )
+        gemini_models[model_name, batched] = genai.GenerativeModel(model_name, generation_config=generation_config, system_instruction=SYSTEM_PROMPT)
     except Exception as e:
-        print(f"\n❌ Failed to configure Gemini or find model '{model_name}': {e}")
+        logger.error("❌ Failed to configure Gemini or find model '%s': %s", model_name, e)
         raise EnvironmentError(f"Could not configure Gemini. Check API key and model name. Error: {e}")
+    return gemini_models[model_name, batched]
+
+
+class PromptBatcher:
+    """
+    Collects row prompts from concurrent workers and sends up to `batch_size` of them to Gemini in a single
+    request, whose reply is a JSON array with one function call object per row. A batch is sent once it is
+    full, or BATCH_MAX_WAIT_SECONDS after its first prompt arrived. A batch whose reply does not hold exactly
+    one object per row is split in half and each half is sent again, down to single rows.
+    """
+
+    def __init__(self, batch_size, rate_limiter=None, model_name=GEMINI_MODEL_NAME):
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter
+        self.model_name = model_name
+        self.pending = [] # (prompt_text, excel_row_number, future) waiting for the next batch
+        self.flush_timer = None
+        self.sending = set() # Keeps references to running batch requests
+
+    async def generate(self, prompt_text, excel_row_number):
+        """
+        Returns the JSON text of this row's function call object, or None if the row ended up in a batch of
+        its own, in which case the caller should send it as a plain single-row request.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((prompt_text, excel_row_number, future))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        elif self.flush_timer is None:
+            self.flush_timer = asyncio.get_running_loop().call_later(BATCH_MAX_WAIT_SECONDS, self.flush)
+        return await future
+
+    def flush(self):
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self.send(batch))
+            self.sending.add(task)
+            task.add_done_callback(self.sending.discard)
+
+    async def send(self, batch):
+        futures = [future for _, _, future in batch]
+        if len(batch) == 1: # Nothing to amortize, the row goes out as a plain single-row request
+            futures[0].set_result(None)
+            return
+        rows_text = f"{batch[0][1]}-{batch[-1][1]}"
+        prompt_text = BATCH_PROMPT_TEMPLATE.format(
+            row_count=len(batch),
+            row_prompts="".join(f"\n### Request {number}\n{row_prompt}" for number, (row_prompt, _, _) in enumerate(batch, 1))
+        )
+        logger.info("  ⏳ Querying Gemini API for %s rows in one request (Rows %s)...", len(batch), rows_text)
+        try:
+            response = await generate_content_with_retries(
+                get_gemini_model(self.model_name, batched=True), prompt_text, rows_text, self.rate_limiter, len(batch)
+            )
+            try:
+                outputs = loads_json(response.text)
+            except Exception: # No candidates (response.text raises) or not valid JSON
+                outputs = None
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        if not isinstance(outputs, list) or len(outputs) != len(batch):
+            # Retry each half as its own batch, a misaligned reply is more likely for long batches
+            count_text = len(outputs) if isinstance(outputs, list) else "no valid"
+            logger.warning("  ⚠️ Gemini returned %s objects for a batch of %s rows (Rows %s). Splitting it in half.", count_text, len(batch), rows_text)
+            half = len(batch) // 2
+            await asyncio.gather(self.send(batch[:half]), self.send(batch[half:]))
+            return
+        for future, output in zip(futures, outputs):
+            future.set_result(dumps_json(output))
+
+
+# No need to re-import genai here if already imported above
+# from google import genai
+
+# ... (Keep all imports and other functions as they are) ...
+
+async def generate_instruction_and_json_with_gemini(project_name, special_column_header, current_value, excel_row_number, raw_response_file, row_data, headers_list, rate_limiter=None, response_cache=None,
+                                                    model_name=GEMINI_MODEL_NAME, fallback_model_name=None, batcher=None, headers_text=None,
+                                                    row_data_template=None):
+    """
+    Generates a Hebrew instruction and JSON function call using Gemini API (compatible method)
+    with robust JSON extraction, saves parsed response details, and includes row data/headers in prompt.
+    The prompt encourages more human-like and varied Hebrew instructions, avoiding repetitive quoting.
+    If the output has no valid function call JSON and fallback_model_name is given, the row is tried
+    once more on that (stronger) model. With a batcher, the row is sent together with other rows.
+    headers_text, the comma-separated headers, and row_data_template (see make_row_data_template) can be passed in
+    so they are not rebuilt for every row.
+    """
+    model = get_gemini_model(model_name)
 
     # Enhanced prompt context presentation
-    row_data_text = "\n".join([f"- {headers_list[i]}: {row_data.get(header, '')}" for i, header in enumerate(headers_list)])
-    headers_text = ", ".join(headers_list)
-
-    # ----- ***** REFINED PROMPT TEXT ***** -----
-    prompt_text = f"""
-    You are an expert in generating realistic, human-like instructions for updating Excel sheets in Hebrew.
-    Your goal is to create varied and natural-sounding requests.
-
-    Here is the context from an Excel row:
-    **Available Excel Column Headers:** [{headers_text}]
-    **Project Name:** {project_name}
-    **Column to Update:** {special_column_header}
-    **Current Value in '{special_column_header}' column:** {current_value}
-    **Full Row Data:**
-    {row_data_text}
-
-    Please perform the following tasks:
-    1. Decide on a relevant *new* value for the '{special_column_header}' column related to the project "{project_name}", considering all the row data.
-    2. Generate a natural language instruction *in Hebrew* telling someone to make this update.
-    3. Generate a JSON object representing a function call to 'excel_update_cell_by_lookup' to execute the update.
-
-    **Instructions for the Hebrew Instruction (Task 2):**
-    - **Variety is key!** Phrase the instruction as a real person might ask a colleague. Use different sentence structures: direct commands, questions, polite requests, statements about what needs doing.
-    - **Refer to the project, column, and values naturally.** Don't just repeat the names rigidly. Examples: "לגבי {project_name}, צריך לשנות את ה{special_column_header} ל...", "אפשר לעדכן בבקשה את הסטטוס של הפרויקט הזה?", "הערך הנוכחי ({current_value}) בעמודה {special_column_header} לא נכון, שנה ל...", "מה הסטטוס החדש של {project_name}?".
-    - **CRITICAL: Avoid consistently putting project names, column names, or values inside single quotes (' ') in the instruction text.** Use quotes only if they are truly natural in Hebrew for emphasis in that specific context, which should be rare. Refer to things directly by name or description.
-    - Minor, realistic-sounding grammatical quirks or informalities are okay if they sound natural, but the instruction must be clear.
-
-    **Instructions for the JSON Object (Task 3):**
-    - Generate a JSON object in *exactly* this format:
-    ```json
-    {{
-      "function_name": "excel_update_cell_by_lookup",
-      "parameters": {{
-        "row_header": "שם הפרויקט",
-        "row_value": "<project_name_in_hebrew>",
-        "col_header": "<special_column_header_in_hebrew>",
-        "new_value": "<new_value_in_hebrew>"
-      }}
-    }}
-    ```
-    - Ensure:
-        a) The `instruction` key holds the Hebrew instruction generated in Task 2.
-        b) All JSON string values (`row_value`, `col_header`, `new_value`) are in Hebrew. Note: These JSON *values* must be strings, even if the instruction doesn't use quotes.
-        c) Output *only* the complete JSON object, enclosed in ```json ... ``` markers. Do not include any other text before or after the JSON block.
-
-    Example of desired JSON output structure (the instruction text itself should vary greatly based on the rules above):
-    ```json
-    {{
-      "instruction": "בפרויקט {project_name} צריך לעדכן את {special_column_header} שיהיה [ערך חדש]", // Natural phrasing, replace placeholders
-      "function_name": "excel_update_cell_by_lookup",
-      "parameters": {{
-        "row_header": "שם הפרויקט",
-        "row_value": "שם פרויקט לדוגמה", // Value is a string
-        "col_header": "כותרת עמודה לדוגמה", // Value is a string
-        "new_value": "ערך חדש לדוגמה" // Value is a string
-      }}
-    }}
-    ```
-    """
-    # ----- ***** END OF REFINED PROMPT TEXT ***** -----
-
-
-    print(f"  ⏳ Querying Gemini API for Hebrew instruction and JSON for '{project_name}' (Row {excel_row_number})...", end=" ", flush=True)
+    if row_data_template is None:
+        row_data_template = make_row_data_template(headers_list)
+    row_data_text = row_data_template.format(*[row_data.get(header, '') for header in headers_list])
+    if headers_text is None:
+        headers_text = ", ".join(map(str, headers_list)) # Headers read with openpyxl may be numbers or None
+
+    # Only the row-specific part is sent per request, the static rules are in SYSTEM_PROMPT
+    prompt_text = ROW_PROMPT_TEMPLATE.format(
+        headers_text=headers_text,
+        project_name=project_name,
+        special_column_header=special_column_header,
+        current_value=current_value,
+        row_data_text=row_data_text
+    )
+
+
+    cached_output = response_cache.get(model_name, SYSTEM_PROMPT + prompt_text) if response_cache is not None else None
+
+    if cached_output is None and batcher is None:
+        logger.info("  ⏳ Querying Gemini API for Hebrew instruction and JSON for '%s' (Row %s)...", project_name, excel_row_number)
 
     try:
-        # API Call (compatible method)
-        response = model.generate_content(
-            contents=[prompt_text],
-            # safety_settings={'HARASSMENT': 'BLOCK_NONE', 'HATE_SPEECH': 'BLOCK_NONE', 'SEXUAL': 'BLOCK_NONE', 'DANGEROUS': 'BLOCK_NONE'} # Uncomment if needed
-             generation_config=genai.types.GenerationConfig(
-                 # temperature=0.9 # Increase temperature for more creativity/variation if needed (e.g., 0.7 to 1.0)
-             )
-        )
+        batched_output = None
+        if cached_output is None and batcher is not None:
+            batched_output = await batcher.generate(prompt_text, excel_row_number)
+        if cached_output is None and batched_output is None:
+            if batcher is not None:
+                logger.info("  ⏳ Querying Gemini API for Hebrew instruction and JSON for '%s' (Row %s)...", project_name, excel_row_number)
+            # API Call (compatible method), awaited so other rows can be in flight meanwhile
+            response = await generate_content_with_retries(model, prompt_text, excel_row_number, rate_limiter)
 
         # --- Response processing and JSON extraction (Keep this logic the same) ---
         gemini_output = ""
-        if not response.candidates:
-             print(f"❌ No candidates returned. Possible safety block or other issue.")
+        if cached_output is not None:
+            gemini_output = cached_output
+            logger.info("  💾 Using cached Gemini response for '%s' (Row %s).", project_name, excel_row_number)
+        elif batched_output is not None:
+            gemini_output = batched_output
+        elif not response.candidates:
+             logger.error("❌ No candidates returned. Possible safety block or other issue.")
              # Add improved feedback check if available
              try:
                  feedback = response.prompt_feedback
-                 print(f"   Response prompt feedback: {feedback}")
+                 logger.warning("   Response prompt feedback: %s", feedback)
                  reason = f"{feedback}"
              except Exception:
-                  print("   Could not retrieve detailed prompt feedback.")
+                  logger.warning("   Could not retrieve detailed prompt feedback.")
                   reason = "Unknown reason (no candidates)"
 
              error_raw_info = {
@@ -176,78 +683,87 @@ def generate_instruction_and_json_with_gemini(project_name, special_column_heade
                  "parsed_function_call_json": {"error": "No Content Generated", "reason": reason},
                  "excel_headers": headers_list
              }
-             raw_response_file.write(json.dumps(error_raw_info, ensure_ascii=False, indent=2) + ",\n")
-             raw_response_file.flush()
+             write_raw_record(raw_response_file, error_raw_info)
              return None, None
 
-        try:
-            # Prioritize getting text from parts if available
-            if response.candidates[0].content and response.candidates[0].content.parts:
-                 gemini_output = "".join(part.text for part in response.candidates[0].content.parts).strip()
-            # Fallback to response.text if parts aren't structured as expected but text attribute exists
-            elif hasattr(response, 'text'):
-                 gemini_output = response.text.strip()
-            else:
-                 gemini_output = str(response.candidates[0].content)
-                 print("⚠️ Gemini response content structure unexpected, using basic string conversion.")
-        except (IndexError, AttributeError, Exception) as e:
-            print(f"❌ Error accessing response content: {e}")
-            gemini_output = "" # Ensure it's empty if access fails
+        else:
+            try:
+                # Prioritize getting text from parts if available
+                if response.candidates[0].content and response.candidates[0].content.parts:
+                     gemini_output = "".join(part.text for part in response.candidates[0].content.parts).strip()
+                # Fallback to response.text if parts aren't structured as expected but text attribute exists
+                elif hasattr(response, 'text'):
+                     gemini_output = response.text.strip()
+                else:
+                     gemini_output = str(response.candidates[0].content)
+                     logger.warning("⚠️ Gemini response content structure unexpected, using basic string conversion.")
+            except (IndexError, AttributeError, Exception) as e:
+                logger.error("❌ Error accessing response content: %s", e)
+                gemini_output = "" # Ensure it's empty if access fails
 
 
         if not isinstance(gemini_output, str) or not gemini_output:
-             print("⚠️ Gemini response format unexpected or empty.")
+             logger.warning("⚠️ Gemini response format unexpected or empty.")
              # Log empty/failed response detail
              error_raw_info = {
                  "excel_row_number": excel_row_number,
                  "parsed_function_call_json": {"error": "Empty or Invalid Response Format"},
                  "excel_headers": headers_list
              }
-             raw_response_file.write(json.dumps(error_raw_info, ensure_ascii=False, indent=2) + ",\n")
-             raw_response_file.flush()
+             write_raw_record(raw_response_file, error_raw_info)
              return None, None # Treat as failure
 
-        print("✅ Done.")
+        if cached_output is None:
+            logger.info("  ✅ Gemini response received for row %s.", excel_row_number)
 
         # --- JSON Extraction Logic ---
         instruction_hebrew = None
         function_call_json = None
         extracted_json_string = None
 
-        # Regex to find JSON block ```json ... ``` or just { ... }
-        json_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```|\s*(\{[\s\S]*?\})\s*', gemini_output, re.IGNORECASE | re.MULTILINE)
+        if gemini_output.startswith("{"): # JSON mode output is the object itself
+            extracted_json_string = gemini_output
+        else: # Fenced or wrapped output, e.g. cached from before JSON mode
+            extracted_json_string = find_json_object_text(gemini_output)
+            if extracted_json_string is None: # Let the regex pick a candidate, so the parse error gets reported
+                json_match = JSON_BLOCK_PATTERN.search(gemini_output)
+                if json_match:
+                    extracted_json_string = json_match.group(1) or json_match.group(2)
 
-        if json_match:
-            extracted_json_string = json_match.group(1) or json_match.group(2)
+        if extracted_json_string is not None:
             try:
-                function_call_json = json.loads(extracted_json_string)
+                function_call_json = loads_json(extracted_json_string)
                 # Validate expected keys exist
                 if not isinstance(function_call_json, dict) or \
                    "instruction" not in function_call_json or \
                    "function_name" not in function_call_json or \
                    "parameters" not in function_call_json or \
                    not isinstance(function_call_json.get("parameters"), dict):
-                    print(f"  ⚠️ Parsed JSON is missing required keys (instruction, function_name, parameters dict).")
+                    logger.warning("  ⚠️ Parsed JSON is missing required keys (instruction, function_name, parameters dict).")
                     instruction_hebrew = function_call_json.get("instruction", "Instruction Missing, JSON Structure Invalid") # Try to get instruction anyway
                     function_call_json = None # Mark JSON as invalid
                 else:
                     instruction_hebrew = function_call_json.get("instruction")
                     if not instruction_hebrew: # Handle empty instruction string
-                         print("  ⚠️ 'instruction' key exists in JSON but the value is empty.")
+                         logger.warning("  ⚠️ 'instruction' key exists in JSON but the value is empty.")
                          instruction_hebrew = "Instruction Empty in JSON"
                          function_call_json = None # Treat as invalid if instruction is mandatory and empty
 
 
             except json.JSONDecodeError as e:
-                print(f"  ⚠️ Gemini generated invalid JSON string: {e}")
+                logger.warning("  ⚠️ Gemini generated invalid JSON string: %s", e)
                 instruction_hebrew = gemini_output.strip() if gemini_output.strip() else f"JSON Parsing Error: {e}"
                 function_call_json = None
 
         else:
-            print(f"  ⚠️ No JSON block found in Gemini output.")
+            logger.warning("  ⚠️ No JSON block found in Gemini output.")
             instruction_hebrew = gemini_output.strip() if gemini_output.strip() else "No JSON and No Text Output"
             function_call_json = None
 
+        # Cache outputs that produced a valid function call, so re-runs can skip the API call
+        if response_cache is not None and cached_output is None and function_call_json:
+            response_cache.put(model_name, SYSTEM_PROMPT + prompt_text, gemini_output)
+
         # --- Save Parsed Details ---
         raw_response_details_json = {
             "excel_row_number": excel_row_number,
@@ -256,10 +772,9 @@ def generate_instruction_and_json_with_gemini(project_name, special_column_heade
         }
         # Use try-except for file writing for robustness
         try:
-            raw_response_file.write(json.dumps(raw_response_details_json, ensure_ascii=False, indent=2) + ",\n")
-            raw_response_file.flush()
+            write_raw_record(raw_response_file, raw_response_details_json)
         except Exception as file_err:
-             print(f"  ⚠️ Failed to write details to raw log file: {file_err}")
+             logger.warning("  ⚠️ Failed to write details to raw log file: %s", file_err)
 
 
         # --- Return Value Logic ---
@@ -267,14 +782,24 @@ def generate_instruction_and_json_with_gemini(project_name, special_column_heade
         if not function_call_json:
              instruction_hebrew = None # Signal failure clearly
 
+             # Cheap model first: give rows it got wrong one more try on the fallback model
+             if fallback_model_name and fallback_model_name != model_name:
+                 logger.warning("  🔀 Retrying row %s with %s after invalid output from %s.", excel_row_number, fallback_model_name, model_name)
+                 routing_stats["fallback_attempts"] += 1
+                 instruction_hebrew, function_call_json = await generate_instruction_and_json_with_gemini(
+                     project_name, special_column_header, current_value, excel_row_number, raw_response_file, row_data, headers_list,
+                     rate_limiter, response_cache, model_name=fallback_model_name, headers_text=headers_text,
+                     row_data_template=row_data_template
+                 )
+                 if function_call_json:
+                     routing_stats["fallback_successes"] += 1
+
         return instruction_hebrew, function_call_json
 
     # --- Exception Handling ---
     except Exception as e:
-        print(f"❌ Unhandled Error during Gemini API call or processing: {e}")
-        import traceback
-        print(traceback.format_exc())
-        print(f"  ⚠️ Gemini API call failed for '{project_name}' (Row {excel_row_number}). Skipping.")
+        logger.error("❌ Unhandled Error during Gemini API call or processing: %s", e, exc_info=True)
+        logger.warning("  ⚠️ Gemini API call failed for '%s' (Row %s). Skipping.", project_name, excel_row_number)
         # Log minimal info to raw file
         error_raw_info = {
              "excel_row_number": excel_row_number,
@@ -282,10 +807,9 @@ def generate_instruction_and_json_with_gemini(project_name, special_column_heade
              "excel_headers": headers_list
          }
         try:
-            raw_response_file.write(json.dumps(error_raw_info, ensure_ascii=False, indent=2) + ",\n")
-            raw_response_file.flush()
+            write_raw_record(raw_response_file, error_raw_info)
         except Exception as file_err:
-             print(f"  ⚠️ Also failed to write error details to raw log file: {file_err}")
+             logger.warning("  ⚠️ Also failed to write error details to raw log file: %s", file_err)
         return None, None
 
 
@@ -295,37 +819,55 @@ def generate_instruction_and_json_with_gemini(project_name, special_column_heade
 # You only need to replace the generate_instruction_and_json_with_gemini function.
 
 
-def generate_data_point_from_excel_row(excel_file_path, row_data, row_index, headers, raw_response_file, headers_list):
+async def generate_data_point_from_excel_row(excel_file_path, row_data, row_index, headers, raw_response_file, headers_list, rate_limiter=None, response_cache=None,
+                                             fallback_model_name=None, batcher=None, seen_rows=None, available_columns=None, headers_text=None,
+                                             row_data_template=None):
     """
     Generates a data point (instruction, function call, context) from an Excel row using Gemini and saves parsed response details.
     Handles JSON validation and error cases.
+    seen_rows maps (project, column to update, current value, row values) to the Gemini task of the first row with
+    them; later identical rows await that task instead of sending the same request again.
+    available_columns (the headers other than the project name), headers_text and row_data_template are the same
+    for every row, so callers processing many rows compute them once and pass them in.
     """
     project_name_header = "שם הפרויקט" # Assuming this is the key column in Hebrew
 
-    if project_name_header not in headers:
-        print(f"Error: Column '{project_name_header}' not found in Excel headers.")
-        return None, "MissingProjectNameColumn"
+    if available_columns is None:
+        if project_name_header not in headers:
+            logger.error("Error: Column '%s' not found in Excel headers.", project_name_header)
+            return None, "MissingProjectNameColumn"
+        available_columns = [header for header in headers if header != project_name_header]
 
     # Handle potential NaN or None values in project name gracefully
     project_name_val = row_data.get(project_name_header)
-    project_name = str(project_name_val) if pd.notna(project_name_val) else "Unknown Project"
+    project_name = str(project_name_val) if project_name_val is not None else "Unknown Project"
 
 
-    available_columns = [header for header in headers if header != project_name_header]
     if not available_columns:
-        print(f"Warning: No columns available to update other than '{project_name_header}'. Skipping row {row_index + 2}.")
+        logger.warning("Warning: No columns available to update other than '%s'. Skipping row %s.", project_name_header, row_index + 2)
         return None, "NoColumnsToUpdate"
 
     special_column_header = random.choice(available_columns)
     # special_col_index = headers.get_loc(special_column_header) # Index not directly needed here
     current_value_val = row_data.get(special_column_header)
-    current_value = str(current_value_val) if pd.notna(current_value_val) else "" # Handle NaN/None current values
+    current_value = str(current_value_val) if current_value_val is not None else "" # Handle empty current values
 
     excel_row_number = row_index + 2 # Excel row number for context
 
-    instruction, function_call_json = generate_instruction_and_json_with_gemini(
-        project_name, special_column_header, current_value, excel_row_number, raw_response_file, row_data.to_dict(), headers_list # Pass row_data as dict
-    )
+    row_key = (project_name, special_column_header, current_value, tuple(row_data.items()))
+    if seen_rows is not None and row_key in seen_rows:
+        logger.warning("  ♻️ Row %s is identical to an earlier row, reusing its Gemini result.", excel_row_number)
+        duplicate_stats["duplicate_rows"] += 1
+        instruction, function_call_json = await asyncio.shield(seen_rows[row_key])
+    else:
+        gemini_task = asyncio.ensure_future(generate_instruction_and_json_with_gemini(
+            project_name, special_column_header, current_value, excel_row_number, raw_response_file, row_data, headers_list,
+            rate_limiter, response_cache, fallback_model_name=fallback_model_name, batcher=batcher, headers_text=headers_text,
+            row_data_template=row_data_template
+        ))
+        if seen_rows is not None:
+            seen_rows[row_key] = gemini_task
+        instruction, function_call_json = await gemini_task
 
     if instruction and function_call_json:
         # Basic JSON validation
@@ -334,7 +876,7 @@ def generate_data_point_from_excel_row(excel_file_path, row_data, row_index, hea
            "parameters" not in function_call_json or \
            not isinstance(function_call_json.get("parameters"), dict) or \
            "instruction" not in function_call_json: # Check for instruction key as well
-            print(f"  ⚠️ Gemini JSON structure is invalid or missing 'instruction' key for row {excel_row_number}.")
+            logger.warning("  ⚠️ Gemini JSON structure is invalid or missing 'instruction' key for row %s.", excel_row_number)
             # The error details were already saved to the raw file inside the Gemini function
             return None, "InvalidJSONStructure"
 
@@ -343,7 +885,7 @@ def generate_data_point_from_excel_row(excel_file_path, row_data, row_index, hea
             "context": {
                 "PROJECTS": { # Assuming this structure is desired for the final dataset
                     "headers": headers_list, # Use the consistent list
-                    "rows": [row_data.to_dict()] # Current row data as context
+                    "rows": [row_data] # Current row data as context
                 }
             },
             "function_call": function_call_json, # The extracted and validated function call JSON
@@ -360,13 +902,151 @@ def generate_data_point_from_excel_row(excel_file_path, row_data, row_index, hea
         elif not instruction and not function_call_json: # e.g., API error, safety stop
              status = "GeminiAPIFailureOrSafety"
 
-        print(f"  ⚠️ Failed to generate valid data point for row {excel_row_number}. Status: {status}")
+        logger.warning("  ⚠️ Failed to generate valid data point for row %s. Status: %s", excel_row_number, status)
         return None, status
 
 
+async def process_rows(excel_file_path, rows, raw_response_file, examples_file, headers_list, num_examples_to_generate, concurrency,
+                       requests_per_minute=DEFAULT_RPM_LIMIT, tokens_per_minute=DEFAULT_TPM_LIMIT, cache_file_path=None,
+                       fallback_model_name=FALLBACK_MODEL_NAME, rows_per_request=DEFAULT_ROWS_PER_REQUEST, progress_bar=None):
+    """
+    Generates data points for rows, an iterable of (row_index, row_data) pairs, with up to `concurrency` Gemini requests in flight,
+    paced by a rate limiter shared by all workers. When cache_file_path is given, responses cached there
+    by earlier runs are reused instead of calling the API again. Rows that get no valid function call JSON
+    from the default model are retried once on fallback_model_name, unless it is None.
+    With rows_per_request > 1, rows are packed into batched requests, and concurrency * rows_per_request
+    rows are worked on at once so that `concurrency` still counts requests in flight.
+    A fixed pool of workers pulls rows in order from a shared iterator and stops taking new rows once
+    num_examples_to_generate examples succeeded. The raw response file needs no lock: every write
+    happens between two awaits on the single event loop thread, so records never interleave.
+
+    Successful data points and error records are written to examples_file as JSON Lines in row order, cut off
+    after the target number of successful examples, the same as processing the rows one by one would produce.
+    Rows completing ahead of an earlier row wait in memory until it is done, so at most about one row per
+    worker is held at a time. Both files are flushed every FLUSH_EVERY_ROWS written rows.
+    Returns the (written successes, written errors) counts.
+    If progress_bar (a tqdm bar) is given, it advances with every successful example.
+    """
+    project_name_header = "שם הפרויקט"
+    rows = enumerate(rows) # Shared by all workers, (position, (original index, row dict))
+    results = {} # position -> (original_index, row, data_point, status), for rows not written yet
+    next_position = 0 # Next row to be written to examples_file
+    success_count = 0
+    failed_count = 0
+    written_success_count = 0
+    written_error_count = 0
+    rate_limiter = GeminiRateLimiter(requests_per_minute, tokens_per_minute)
+    response_cache = ResponseCache(cache_file_path) if cache_file_path else None
+    batcher = PromptBatcher(rows_per_request, rate_limiter) if rows_per_request > 1 else None
+    seen_rows = {} # Gemini task per distinct row request, shared so duplicate rows skip the API
+    # Per-sheet lookups, computed once instead of for every row
+    available_columns = [header for header in headers_list if header != project_name_header] if project_name_header in headers_list else None
+    headers_text = ", ".join(map(str, headers_list)) # Headers read with openpyxl may be numbers or None
+    row_data_template = make_row_data_template(headers_list)
+
+    def write_ready_results():
+        nonlocal next_position, written_success_count, written_error_count
+        while next_position in results and written_success_count < num_examples_to_generate:
+            original_index, row, data_point, status = results.pop(next_position)
+            next_position += 1
+            if status == "success" and data_point:
+                record = data_point
+                written_success_count += 1
+            else:
+                # Error details already printed and logged to raw file within the functions
+                record = {
+                    "excel_file_path": excel_file_path,
+                    "excel_row_number": original_index + 2,
+                    "project_name": str(row.get(project_name_header, 'N/A')),
+                    "error_type": status, # Store the error status string
+                    "processing_status": "error" # Mark as error in general output
+                }
+                written_error_count += 1
+            examples_file.write(dumps_json(record) + "\n")
+            if next_position % FLUSH_EVERY_ROWS == 0:
+                examples_file.flush()
+                raw_response_file.flush()
+
+    async def worker():
+        nonlocal success_count, failed_count
+        for position, (original_index, row) in rows:
+            if success_count >= num_examples_to_generate:
+                break
+
+            excel_row_number = original_index + 2 # Calculate Excel row number (original index + 2)
+            project_name_display = row.get(project_name_header, 'N/A')
+            logger.info("Processing Excel Row %s (Project: '%s')...", excel_row_number, project_name_display) # Row processing feedback
+
+            data_point, status = await generate_data_point_from_excel_row(
+                excel_file_path, row, original_index, headers_list, raw_response_file, headers_list, rate_limiter, response_cache,
+                fallback_model_name, batcher, seen_rows, available_columns, headers_text, row_data_template
+            )
+            results[position] = (original_index, row, data_point, status)
+            write_ready_results()
+
+            if status == "success" and data_point:
+                success_count += 1
+                logger.info("  ✅ Example %s/%s generated successfully for row %s.", success_count, num_examples_to_generate, excel_row_number)
+            else:
+                failed_count += 1
+            if progress_bar is not None:
+                progress_bar.update(1 if status == "success" and data_point else 0)
+                progress_bar.set_postfix(ok=success_count, err=failed_count)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency * rows_per_request)))
+    finally:
+        if response_cache is not None:
+            response_cache.close()
+
+    if written_success_count >= num_examples_to_generate:
+        logger.info("Reached target of %s examples. Stopping.", num_examples_to_generate)
+    return written_success_count, written_error_count
+
+
+def read_checkpoint(examples_file_path):
+    """
+    Counts the records an earlier run left in the examples JSON Lines file, as (successes, errors). Records are
+    written in row order, one per row, so their total is the number of rows to skip when resuming.
+    A trailing partial line, left when that run was killed mid-write, is truncated away.
+    """
+    success_count = 0
+    error_count = 0
+    complete_length = 0
+    with open(examples_file_path, 'rb+') as examples_file:
+        for line in examples_file:
+            try:
+                record = loads_json(line) if line.endswith(b"\n") else None
+            except json.JSONDecodeError:
+                record = None
+            if record is None:
+                break
+            if record.get("processing_status") == "error":
+                error_count += 1
+            else:
+                success_count += 1
+            complete_length += len(line)
+        examples_file.truncate(complete_length)
+    return success_count, error_count
+
+
+def read_examples_file(examples_file_path):
+    """Splits the records of an examples JSON Lines file into (generated_examples, error_examples) lists."""
+    generated_examples = []
+    error_examples = []
+    with open(examples_file_path, 'r', encoding='utf-8') as examples_file:
+        for line in examples_file:
+            record = loads_json(line)
+            if record.get("processing_status") == "error":
+                error_examples.append(record)
+            else:
+                generated_examples.append(record)
+    return generated_examples, error_examples
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print(f"Usage: python {os.path.basename(__file__)} <excel_file_path> [--start_row <row_number>]")
+        print(f"Usage: python {os.path.basename(__file__)} <excel_file_path> [--start_row <row_number>] [--concurrency <n>] [--rpm <n>] [--tpm <n>] [--cache_file <path>] [--no_cache] [--no_fallback] [--rows_per_request <n>] [--emit_legacy_json] [--verbose] [--resume]")
         sys.exit(1)
 
     excel_file_path = sys.argv[1]
@@ -390,6 +1070,28 @@ if __name__ == "__main__":
         print(f"An error occurred while parsing command line arguments: {e}")
         sys.exit(1)
 
+    # Parse concurrency and rate limit arguments
+    concurrency = get_int_option(sys.argv, '--concurrency', DEFAULT_CONCURRENCY, 1)
+    requests_per_minute = get_int_option(sys.argv, '--rpm', DEFAULT_RPM_LIMIT, 1)
+    tokens_per_minute = get_int_option(sys.argv, '--tpm', DEFAULT_TPM_LIMIT, 1)
+    rows_per_request = get_int_option(sys.argv, '--rows_per_request', DEFAULT_ROWS_PER_REQUEST, 1)
+    emit_legacy_json = '--emit_legacy_json' in sys.argv
+    verbose = '--verbose' in sys.argv or tqdm is None
+    resume = '--resume' in sys.argv
+
+    # Parse cache arguments
+    cache_file_path = os.path.join(os.path.dirname(__file__) or '.', "gemini_response_cache.sqlite")
+    if '--cache_file' in sys.argv:
+        cache_file_index_arg = sys.argv.index('--cache_file') + 1
+        if cache_file_index_arg >= len(sys.argv):
+            print("Error: Invalid --cache_file argument. --cache_file option requires a path.")
+            sys.exit(1)
+        cache_file_path = sys.argv[cache_file_index_arg]
+    if '--no_cache' in sys.argv:
+        cache_file_path = None
+
+    fallback_model_name = None if '--no_fallback' in sys.argv else FALLBACK_MODEL_NAME
+
 
     if not os.path.exists(excel_file_path):
         print(f"Error: Excel file not found at path: {excel_file_path}")
@@ -399,92 +1101,81 @@ if __name__ == "__main__":
     # Define output file names relative to the script location
     script_dir = os.path.dirname(__file__) or '.' # Handle running from current dir
     output_file = os.path.join(script_dir, "synthetic_excel_data_gemini_hebrew_humanlike.json")
-    raw_responses_details_file_path = os.path.join(script_dir, "gemini_parsed_responses_details.json") # Renamed to reflect content
-
-    generated_examples = [] # Store successful examples
-    error_examples = [] # Store examples with errors
+    examples_file_path = os.path.join(script_dir, "synthetic_excel_data_gemini_hebrew_humanlike.jsonl") # JSON Lines, one example per line
+    raw_responses_details_file_path = os.path.join(script_dir, "gemini_parsed_responses_details.jsonl") # JSON Lines, one record per request
+    error_log_file_path = os.path.join(script_dir, "gemini_errors.log")
+
+    # Warnings and errors go to the log file, per-row messages to the console only in verbose mode
+    logger.setLevel(logging.INFO)
+    output_mode = 'a' if resume else 'w' # Resumed runs append to the files of the interrupted run
+    error_log_handler = logging.FileHandler(error_log_file_path, mode=output_mode, encoding='utf-8')
+    error_log_handler.setLevel(logging.WARNING)
+    error_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(error_log_handler)
+    if verbose:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(console_handler)
+
+    success_count = 0 # Examples written to the JSON Lines file
+    error_count = 0
+    resumed_success_count = 0 # Examples kept from the interrupted run, with --resume
+    resumed_error_count = 0
 
     try:
         print(f"Reading Excel file: {excel_file_path}...")
-        # Specify engine based on file extension if needed, especially for older .xls
-        engine = 'openpyxl' if excel_file_path.endswith('.xlsx') else None
-        df = pd.read_excel(excel_file_path, engine=engine)
-        headers_list = list(df.columns) # Get headers list here
+        # Stream rows of .xlsx files, older formats such as .xls are read with pandas
+        headers_list, excel_rows = read_excel_rows(excel_file_path)
 
         project_name_header = "שם הפרויקט" # Make sure this matches your Excel
         if project_name_header not in headers_list:
             print(f"Error: Required column '{project_name_header}' not found in the Excel file headers: {headers_list}")
             sys.exit(1)
 
-        # Convert Excel row number (1-based, header is row 1) to pandas 0-based index
-        # start_row = 2 means first data row, which is pandas index 0
-        start_pandas_row_index = start_row - 2
-        if start_pandas_row_index < 0:
-            start_pandas_row_index = 0 # Should not happen if start_row >= 2
-
-        if start_pandas_row_index >= len(df):
-            print(f"Warning: start_row ({start_row}) is beyond the last data row ({len(df)+1}) of the Excel file. No rows to process.")
+        # Convert Excel row number (1-based, header is row 1) to a 0-based data row index
+        # start_row = 2 means first data row, which is index 0
+        start_row_index = start_row - 2
+        if start_row_index < 0:
+            start_row_index = 0 # Should not happen if start_row >= 2
+
+        # Skip the rows an interrupted run already wrote, they follow start_row in order
+        resumed_row_count = 0
+        if resume and os.path.exists(examples_file_path):
+            resumed_success_count, resumed_error_count = read_checkpoint(examples_file_path)
+            resumed_row_count = resumed_success_count + resumed_error_count
+            print(f"Resuming: keeping {resumed_success_count} examples and {resumed_error_count} errors from the previous run, "
+                  f"skipping its {resumed_row_count} rows.")
+            if resumed_success_count >= num_examples_to_generate:
+                print(f"The previous run already reached the target of {num_examples_to_generate} examples. Nothing to do.")
+                sys.exit(0)
+
+        # Skip to the correct row, keeping each row's index for the Excel row number
+        rows_to_process = islice(enumerate(excel_rows), start_row_index + resumed_row_count, None)
+        first_row = next(rows_to_process, None)
+        if first_row is None:
+            print(f"Warning: start_row ({start_row + resumed_row_count}) is beyond the last data row of the Excel file. No rows to process.")
             sys.exit(0)
+        rows_to_process = chain([first_row], rows_to_process)
+        print(f"Processing rows starting from Excel row {start_row + resumed_row_count} (data row index {start_row_index + resumed_row_count}).")
 
-        # Slice the DataFrame to start from the correct row
-        df_processed = df.iloc[start_pandas_row_index:].copy() # Use .copy() to avoid SettingWithCopyWarning if modifying later
-        print(f"Processing {len(df_processed)} rows starting from Excel row {start_row} (pandas index {start_pandas_row_index}).")
-
-
-        example_count = 0
-        total_rows_to_process = min(num_examples_to_generate, len(df_processed))
-        print(f"Attempting to generate up to {num_examples_to_generate} examples...")
-
-        # Prepare raw responses JSON file - start with JSON array opening
-        # Use 'w' to overwrite or start fresh each run
-        with open(raw_responses_details_file_path, 'w', encoding='utf-8') as raw_response_file:
-            raw_response_file.write("[\n") # Start JSON array
-
-            # Iterate using df_processed.iterrows() which gives (index, Series) pairs
-            # The index here will be the original DataFrame index
-            for original_index, row in df_processed.iterrows():
-                if example_count >= num_examples_to_generate:
-                    print(f"Reached target of {num_examples_to_generate} examples. Stopping.")
-                    break
-
-                excel_row_number = original_index + 2 # Calculate Excel row number (original index + 2)
-                project_name_display = row.get(project_name_header, 'N/A')
-                print(f"\nProcessing Excel Row {excel_row_number} (Project: '{project_name_display}')...") # Row processing feedback
-
-                # Pass the original index for accurate row tracking if needed elsewhere,
-                # and the row Series, headers list, and file object.
-                data_point, status = generate_data_point_from_excel_row(
-                    excel_file_path, row, original_index, df.columns, raw_response_file, headers_list # Pass df.columns (Index object) and headers_list (list)
-                )
-
-                if status == "success" and data_point:
-                    generated_examples.append(data_point)
-                    print(f"  ✅ Example {example_count + 1}/{num_examples_to_generate} generated successfully for row {excel_row_number}.")
-                    # print(f"     Instruction: {data_point.get('instruction', 'N/A')[:80]}...") # Print snippet
-                    example_count += 1
-                else:
-                    # Error details already printed and logged to raw file within the functions
-                    error_data_point = {
-                        "excel_file_path": excel_file_path,
-                        "excel_row_number": excel_row_number,
-                        "project_name": str(row.get(project_name_header, 'N/A')),
-                        "error_type": status, # Store the error status string
-                        "processing_status": "error" # Mark as error in general output
-                    }
-                    error_examples.append(error_data_point)
-                    # print(f"  ⚠️ Warning handled for row {excel_row_number}. Status: {status}") # Already printed inside functions
-
-
-                # Rate limiting AFTER processing each row
-                print(f"  ⏱️ Waiting 5 seconds before next row...")
-                time.sleep(5)
 
+        print(f"Attempting to generate up to {num_examples_to_generate} examples with up to {concurrency} concurrent requests "
+              f"({requests_per_minute} requests/min, {tokens_per_minute} tokens/min)...")
 
-            # Clean up trailing comma and close raw responses JSON array
-            # Go back 2 characters (comma and newline) and write the closing bracket
-            raw_response_file.seek(raw_response_file.tell() - 2, os.SEEK_SET)
-            raw_response_file.truncate()
-            raw_response_file.write("\n]") # Close JSON array properly
+        # Prepare raw responses JSON Lines file
+        # Use 'w' to overwrite or start fresh each run ('a' with --resume). Closing the files (also on Ctrl-C or errors) flushes the buffers.
+        progress_bar = None if verbose else tqdm(total=num_examples_to_generate, initial=resumed_success_count, unit="example")
+        try:
+            with open(raw_responses_details_file_path, output_mode, encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as raw_response_file, \
+                 open(examples_file_path, output_mode, encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as examples_file:
+                success_count, error_count = asyncio.run(process_rows(
+                    excel_file_path, rows_to_process, raw_response_file, examples_file, headers_list,
+                    num_examples_to_generate - resumed_success_count, concurrency, requests_per_minute, tokens_per_minute, cache_file_path,
+                    fallback_model_name, rows_per_request, progress_bar
+                ))
+        finally:
+            if progress_bar is not None:
+                progress_bar.close()
 
     except FileNotFoundError:
         print(f"Error: Excel file not found at: {excel_file_path}")
@@ -497,47 +1188,46 @@ if __name__ == "__main__":
          sys.exit(1)
     except Exception as e:
         print(f"\nAn unexpected error occurred during processing: {e}")
-        import traceback
         traceback.print_exc() # Print detailed traceback for debugging
-         # Attempt to close the raw JSON file gracefully even on error
-        try:
-             with open(raw_responses_details_file_path, 'a', encoding='utf-8') as raw_file_close:
-                # Check if file is non-empty before trying to fix array structure
-                if raw_file_close.tell() > 5: # Arbitrary small number > size of '['\n'
-                     raw_file_close.seek(raw_file_close.tell() - 2, os.SEEK_SET)
-                     raw_file_close.truncate()
-                     raw_file_close.write("\n]")
-                else: # File likely only has '[' or is empty, just close array
-                     raw_file_close.write("\n]")
-
-        except Exception as file_e:
-             print(f"Additionally, could not properly close the raw JSON file: {file_e}")
-        sys.exit(1)
+        sys.exit(1) # The JSON Lines files need no cleanup, every record written so far is complete
+
 
+    success_count += resumed_success_count
+    error_count += resumed_error_count
 
-    # Combine successful and error examples into final JSON
+    # The examples are already in the JSON Lines file, the main JSON gets the summary
     final_dataset = {
         "generation_summary": {
             "timestamp": datetime.now().isoformat(),
             "excel_file": os.path.basename(excel_file_path),
             "target_examples": num_examples_to_generate,
             "rows_processed_from": start_row,
-            "successful_examples": len(generated_examples),
-            "error_examples": len(error_examples)
-        },
-        "generated_examples": generated_examples,
-        "error_examples": error_examples
+            "successful_examples": success_count,
+            "error_examples": error_count,
+            "examples_file": os.path.basename(examples_file_path),
+            "resumed_examples": resumed_success_count,
+            "model": GEMINI_MODEL_NAME,
+            "fallback_model": fallback_model_name,
+            "fallback_attempts": routing_stats["fallback_attempts"],
+            "fallback_successes": routing_stats["fallback_successes"],
+            "duplicate_rows": duplicate_stats["duplicate_rows"],
+            "duplicate_row_rate": round(duplicate_stats["duplicate_rows"] / max(1, success_count + error_count), 3)
+        }
     }
 
 
     try:
+        if emit_legacy_json: # Rebuild the single-file dataset from the JSON Lines file
+            final_dataset["generated_examples"], final_dataset["error_examples"] = read_examples_file(examples_file_path)
         with open(output_file, 'w', encoding='utf-8') as f_out:
-            json.dump(final_dataset, f_out, ensure_ascii=False, indent=2)
+            f_out.write(dumps_json(final_dataset, indent=True))
         print(f"\n--- Generation Complete ---") # End process feedback
-        print(f"Successfully generated examples: {len(generated_examples)}")
-        print(f"Examples with errors: {len(error_examples)}")
-        print(f"Main dataset saved to: {output_file}")
+        print(f"Successfully generated examples: {success_count}")
+        print(f"Examples with errors: {error_count}")
+        print(f"Examples saved to: {examples_file_path}")
+        print(f"{'Main dataset' if emit_legacy_json else 'Generation summary'} saved to: {output_file}")
         print(f"Parsed response details saved to: {raw_responses_details_file_path}")
+        print(f"Warnings and errors logged to: {error_log_file_path}")
     except Exception as e:
          print(f"\nError saving final JSON output file: {e}")
          sys.exit(1)
\ No newline at end of file
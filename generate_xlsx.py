@@ -1,10 +1,29 @@
-import pandas as pd
-import random
+import numpy as np
+import functools
+import io
 import json
+import sys
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+from openpyxl import Workbook
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq  # Optional: also save the data as Parquet, much faster to read back than .xlsx
+except ImportError:
+    pa = pq = None
 
 # Number of rows to generate
 num_rows = 2000
 
+# Seed for the random data: None draws fresh entropy on every run, an int makes the output reproducible
+random_seed = None
+
 # Define column names directly in the code to ensure it works without dependencies
 column_names = [
   "סטאטוס",
@@ -98,39 +117,71 @@ notes = [f'הערה {i+1}' for i in range(100)] + ['נדרש אישור נוסף
 yes_no_options = ['כן', 'לא', 'בטיפול', 'בהמתנה', 'מאושר', 'לא מאושר', 'תלוי', 'בבדיקה', 'בהכנה', 'סוכם', 'נדחה', 'אושר עקרונית'] # 12 options
 project_statuses = ['בביצוע', 'הושלם', 'בתכנון', 'הוקפא', 'בהמתנה לאישור', 'מושק', 'סוכל', 'מושהה', 'ממתין לתקציב', 'אושר סופית', 'אושר עקרונית', 'נדחה', 'בבדיקה ראשונית', 'בשלבי הקמה', 'בשלבי פיתוח', 'בשלבי יישום', 'בשלבי סיום', 'בשלבי מסירה', 'בשלבי תחזוקה', 'בשלבי שיפוץ', 'בשלבי שדרוג', 'בשלבי פירוק', 'בשלבי סגירה'] # 24 statuses
 
-def generate_date(start_year=2020, end_year=2026):
-    month = random.randint(1, 12)
-    day = random.randint(1, 28) # Keep it simple
-    year = random.randint(start_year, end_year)
-    return f"{day:02d}/{month:02d}/{year}"
+# Vectorized random columns: one NumPy call per column instead of a Python-level call per cell
+# All randomness comes from this single PCG64 Generator. Independent streams for other consumers can be taken with
+# seed_sequence.spawn(n), without correlating them with this one.
+seed_sequence = np.random.SeedSequence(random_seed)
+rng = np.random.default_rng(seed_sequence)
+
+@functools.lru_cache(maxsize=None)
+def options_array(options):
+    """Returns the options tuple as an object array, built once per distinct list of options."""
+    return np.array(options, dtype=object)
+
+def random_choices(options, size=num_rows):
+    """Returns `size` values drawn uniformly (with replacement) from options, as a list."""
+    return options_array(tuple(options))[rng.integers(0, len(options), size=size)].tolist()
+
+def random_integers(low, high, size=num_rows):
+    """Returns `size` random integers between low and high, both inclusive, like random.randint."""
+    return rng.integers(low, high, size=size, endpoint=True).tolist()
+
+# Zero-padded day/month strings, indexed by the drawn numbers instead of formatting each one
+day_strings = [f"{day:02d}" for day in range(29)]
+month_strings = [f"{month:02d}" for month in range(13)]
+
+def generate_dates(start_year=2020, end_year=2026, size=num_rows):
+    """Returns `size` random DD/MM/YYYY date strings between start_year and end_year, both inclusive."""
+    days = random_integers(1, 28, size) # Keep it simple
+    months = random_integers(1, 12, size)
+    years = random_integers(start_year, end_year, size)
+    return [f"{day_strings[day]}/{month_strings[month]}/{year}" for day, month, year in zip(days, months, years)]
+
+# Every "base variation" and "base combination" name, built once, so drawing one is a single index into a pool
+base_variation_names = tuple(sys.intern(f"{base_name} {variation}") for base_name in project_names_base for variation in project_variations)
+base_combination_names = tuple(sys.intern(f"{base_name} {combination}") for base_name in project_names_base for combination in project_combinations)
 
 # Function to generate unique project names
-used_project_names = set()
-def generate_unique_project_name():
-    attempts = 0
-    while attempts < 1000:  # Safety to prevent infinite loop
-        base_name = random.choice(project_names_base)
-        
-        # Randomly decide to use a single variation or a combined variation
-        if random.random() < 0.3 and project_combinations:  # 30% chance to use combination
-            variation = random.choice(project_combinations)
-            project_name = f"{base_name} {variation}"
-        else:
-            variation = random.choice(project_variations)
-            project_name = f"{base_name} {variation}"
-            
-            # Sometimes add a location for more uniqueness
-            if random.random() < 0.4:  # 40% chance to add location
-                location = random.choice(locations)
-                project_name = f"{project_name} - {location}"
-        
-        if project_name not in used_project_names:
-            used_project_names.add(project_name)
-            return project_name
-        attempts += 1
-    
-    # If we failed to generate a unique name, create one with a unique identifier
-    return f"פרויקט מיוחד #{len(used_project_names) + 1} - {base_name}"
+def generate_unique_project_names(count, max_rounds=10):
+    """
+    Generates `count` unique project names. All random decisions of a round are drawn in bulk, duplicates are
+    dropped (keeping the first occurrence) and only the shortfall is drawn again in the next round.
+    """
+    project_names = {} # Insertion-ordered set
+    for _ in range(max_rounds):  # Safety to prevent infinite loop
+        missing = count - len(project_names)
+        if missing <= 0:
+            break
+        draws = missing * 2 # Oversample, so a single round is almost always enough
+        use_combination = (rng.random(draws) < 0.3) & bool(base_combination_names) # 30% chance to use combination
+        combination_names = random_choices(base_combination_names, draws) if base_combination_names else [None] * draws
+        variation_names = random_choices(base_variation_names, draws)
+        add_location = rng.random(draws) < 0.4 # 40% chance to add location, for more uniqueness
+        location_choices = random_choices(locations, draws)
+        for i in range(draws):
+            if use_combination[i]:
+                project_name = combination_names[i]
+            elif add_location[i]:
+                project_name = f"{variation_names[i]} - {location_choices[i]}"
+            else:
+                project_name = variation_names[i]
+            project_names.setdefault(project_name)
+    project_names = list(project_names)[:count]
+
+    # If we failed to generate enough unique names, create the rest with a unique identifier
+    for base_name in random_choices(project_names_base, count - len(project_names)):
+        project_names.append(f"פרויקט מיוחד #{len(project_names) + 1} - {base_name}")
+    return project_names
 
 # Ensure we can generate at least 2000 unique project names
 potential_combinations = len(project_names_base) * len(project_variations) + len(project_combinations) * len(project_names_base)
@@ -140,62 +191,224 @@ if potential_combinations < num_rows:
     print("Using additional strategies to ensure uniqueness")
 
 # Generate fake project data
+# (column index, generator) for every column, in column order. Each generator returns `size` values as a list.
+column_generators = [
+    (0, lambda size: random_choices(project_statuses, size)), # 'סטאטוס'
+    (1, lambda size: random_choices(unit_names, size)), # 'יחידה'
+    (2, lambda size: random_choices(sub_units, size)), # 'תת יחידה'
+    (3, lambda size: random_choices(locations, size)), # 'מיקום'
+    (4, lambda size: random_choices(priorities, size)), # 'תיעדוף '
+    (5, lambda size: generate_unique_project_names(size)), # 'שם הפרויקט' - UNIQUE
+    (6, lambda size: random_integers(1000, 9999, size)), # "מס' פרויקט מיגון"
+    (7, lambda size: random_integers(1000, 9999, size)), # "מס' פרויקט מולטימדיה"
+    (8, lambda size: random_integers(1000, 9999, size)), # "מס' פרויקט תקנ"מ"
+    (9, lambda size: [f'רס״ן {name}' for name in random_choices(["דוד כהן", "יעל לוי", "אורן ישראל", "נועה ברק", "רותם כהן", "אביב לוי", "גלעד מזרחי", "שירה אוחיון", "יוסי ביטון", "מיכל כהן", "איתי לוי", "רועי בר"], size)]), # "מוביל פרוייקט תקשוב אכ\"א" - More names
+    (10, lambda size: random_choices(companies, size)), # "חברת תקשורת/מולטימדיה"
+    (11, lambda size: random_choices(project_types, size)), # "סוג הפרויקט"
+    (12, lambda size: random_choices(task_descriptions, size)), # "מהות המשימה"
+    (13, lambda size: random_choices(yes_no_options, size)), # "תוכנית עבודה" - More options
+    (14, lambda size: random_choices(funding_sources, size)), # "גוף מתקצב"
+    (15, lambda size: random_choices(yes_no_options, size)), # "אישור ב"מ /מצו"ב" - More options
+    (16, lambda size: generate_dates(2020, 2023, size)), # "תאריך רשום בטבלה"
+    (17, lambda size: generate_dates(2020, 2024, size)), # "תאריך פתיחת פרויקט"
+    (18, lambda size: generate_dates(2021, 2024, size)), # "תאריך קבלת דמ"צ"
+    (19, lambda size: random_choices(yes_no_options, size)), # "קבלת דמ"צ" - More options
+    (20, lambda size: random_choices(yes_no_options, size)), # "נפתח פרוייקט" - More options
+    (21, lambda size: random_choices(yes_no_options, size)), # "תוקצב" - More options
+    (22, lambda size: random_integers(2019, 2025, size)), # "שנת עבודה"
+    (23, lambda size: random_integers(10000, 500000, size)), # "אומדן ציוד תקשוב דולרי"
+    (24, lambda size: random_integers(50000, 2000000, size)), # "אומדן ציוד תקשוב שיקלי"
+    (25, lambda size: random_integers(1000, 500000, size)), # "אומדן שקלי "
+    (26, lambda size: random_integers(5000, 500000, size)), # "אומדן מולטימדיה שקלי"
+    (27, lambda size: random_integers(5000, 500000, size)), # "אומדן דולרי חוש"ן"
+    (28, lambda size: random_integers(1000, 100000, size)), # "תוספת אומדן שיקלי"
+    (29, lambda size: random_integers(1000, 50000, size)), # "תוספת אומדן דולרי"
+    (30, lambda size: random_integers(50000, 4000000, size)), # "סה"כ אומדן שיקלי"
+    (31, lambda size: random_integers(10000, 1000000, size)), # "סה"כ אומדן דולרי"
+    (32, lambda size: generate_dates(2022, 2026, size)), # "תאריך סיום בינוי"
+    (33, lambda size: generate_dates(2022, 2026, size)), # "סיום תקשוב"
+    (34, lambda size: generate_dates(2023, 2026, size)), # "צפי סיום"
+    (35, lambda size: generate_dates(2023, 2026, size)), # "סיום בפועל"
+    (36, lambda size: random_choices(notes, size)), # "הערות"
+]
+
 data = {}
-data[column_names[0]] = [random.choice(project_statuses) for _ in range(num_rows)] # 'סטאטוס'
-data[column_names[1]] = [random.choice(unit_names) for _ in range(num_rows)] # 'יחידה'
-data[column_names[2]] = [random.choice(sub_units) for _ in range(num_rows)] # 'תת יחידה'
-data[column_names[3]] = [random.choice(locations) for _ in range(num_rows)] # 'מיקום'
-data[column_names[4]] = [random.choice(priorities) for _ in range(num_rows)] # 'תיעדוף '
-data[column_names[5]] = [generate_unique_project_name() for _ in range(num_rows)] # 'שם הפרויקט' - UNIQUE
-data[column_names[6]] = [random.randint(1000, 9999) for _ in range(num_rows)] # "מס' פרויקט מיגון"
-data[column_names[7]] = [random.randint(1000, 9999) for _ in range(num_rows)] # "מס' פרויקט מולטימדיה"
-data[column_names[8]] = [random.randint(1000, 9999) for _ in range(num_rows)] # "מס' פרויקט תקנ"מ"
-data[column_names[9]] = [f'רס״ן {random.choice(["דוד כהן", "יעל לוי", "אורן ישראל", "נועה ברק", "רותם כהן", "אביב לוי", "גלעד מזרחי", "שירה אוחיון", "יוסי ביטון", "מיכל כהן", "איתי לוי", "רועי בר"]) }' for _ in range(num_rows)] # "מוביל פרוייקט תקשוב אכ\"א" - More names
-data[column_names[10]] = [random.choice(companies) for _ in range(num_rows)] # "חברת תקשורת/מולטימדיה"
-data[column_names[11]] = [random.choice(project_types) for _ in range(num_rows)] # "סוג הפרויקט"
-data[column_names[12]] = [random.choice(task_descriptions) for _ in range(num_rows)] # "מהות המשימה"
-data[column_names[13]] = [random.choice(yes_no_options) for _ in range(num_rows)] # "תוכנית עבודה" - More options
-data[column_names[14]] = [random.choice(funding_sources) for _ in range(num_rows)] # "גוף מתקצב"
-data[column_names[15]] = [random.choice(yes_no_options) for _ in range(num_rows)] # "אישור ב"מ /מצו"ב" - More options
-data[column_names[16]] = [generate_date(2020, 2023) for _ in range(num_rows)] # "תאריך רשום בטבלה"
-data[column_names[17]] = [generate_date(2020, 2024) for _ in range(num_rows)] # "תאריך פתיחת פרויקט"
-data[column_names[18]] = [generate_date(2021, 2024) for _ in range(num_rows)] # "תאריך קבלת דמ"צ"
-data[column_names[19]] = [random.choice(yes_no_options) for _ in range(num_rows)] # "קבלת דמ"צ" - More options
-data[column_names[20]] = [random.choice(yes_no_options) for _ in range(num_rows)] # "נפתח פרוייקט" - More options
-data[column_names[21]] = [random.choice(yes_no_options) for _ in range(num_rows)] # "תוקצב" - More options
-data[column_names[22]] = [random.randint(2019, 2025) for _ in range(num_rows)] # "שנת עבודה"
-data[column_names[23]] = [random.randint(10000, 500000) for _ in range(num_rows)] # "אומדן ציוד תקשוב דולרי"
-data[column_names[24]] = [random.randint(50000, 2000000) for _ in range(num_rows)] # "אומדן ציוד תקשוב שיקלי"
-data.setdefault(column_names[25], [random.randint(1000, 500000) for _ in range(num_rows)]) # "אומדן שקלי "
-data[column_names[26]] = [random.randint(5000, 500000) for _ in range(num_rows)] # "אומדן מולטימדיה שקלי"
-data[column_names[27]] = [random.randint(5000, 500000) for _ in range(num_rows)] # "אומדן דולרי חוש"ן"
-data[column_names[28]] = [random.randint(1000, 100000) for _ in range(num_rows)] # "תוספת אומדן שיקלי"
-data[column_names[29]] = [random.randint(1000, 50000) for _ in range(num_rows)] # "תוספת אומדן דולרי"
-data[column_names[30]] = [random.randint(50000, 4000000) for _ in range(num_rows)] # "סה"כ אומדן שיקלי"
-data[column_names[31]] = [random.randint(10000, 1000000) for _ in range(num_rows)] # "סה"כ אומדן דולרי"
-data[column_names[32]] = [generate_date(2022, 2026) for _ in range(num_rows)] # "תאריך סיום בינוי"
-data[column_names[33]] = [generate_date(2022, 2026) for _ in range(num_rows)] # "סיום תקשוב"
-data[column_names[34]] = [generate_date(2023, 2026) for _ in range(num_rows)] # "צפי סיום"
-data[column_names[35]] = [generate_date(2023, 2026) for _ in range(num_rows)] # "סיום בפועל"
-data[column_names[36]] = [random.choice(notes) for _ in range(num_rows)] # "הערות"
-
-# Create DataFrame
-df = pd.DataFrame(data)
+for column_index, generate_column in column_generators:
+    data[column_names[column_index]] = generate_column(num_rows)
 
 # Check if we have 2000 unique project names
-unique_projects = df[column_names[5]].nunique()
+unique_projects = len(set(data[column_names[5]]))
 print(f"Generated {unique_projects} unique project names out of {num_rows} rows")
 
 # Save the data to an Excel file
+# The fixed parts of a minimal single-sheet .xlsx package
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def xlsx_number_cell_xml(value):
+    return f'<c><v>{value}</v></c>'
+
+def xlsx_string_cell_xml(value):
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{xml_escape(value)}</t></is></c>'
+
+def xlsx_cell_xml(value):
+    """Returns the <c> element for one value: numbers as plain values, everything else as an inline string."""
+    if value is None:
+        return '<c/>'
+    if is_number(value):
+        return xlsx_number_cell_xml(value)
+    return xlsx_string_cell_xml(str(value))
+
+def column_value_kind(values):
+    """Returns 'number' or 'string' when every value of the column is of that kind, None for mixed columns."""
+    if all(map(is_number, values)):
+        return 'number'
+    if all(type(value) is str for value in values):
+        return 'string'
+    return None
+
+def write_xlsx_streaming(output_file, data, compresslevel=1):
+    """
+    Streams the columns straight into the sheet XML of a minimal .xlsx package, one row at a time, without
+    creating any cell objects. Strings are stored once in the shared strings table and referenced by index.
+    compresslevel trades file size for speed (1 is fastest, 9 is smallest).
+    """
+    headers = list(data)
+    with zipfile.ZipFile(output_file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as package:
+        for part_name, part_xml in XLSX_STATIC_PARTS.items():
+            package.writestr(part_name, part_xml)
+        with package.open("xl/worksheets/sheet1.xml", "w") as raw_sheet:
+            with io.TextIOWrapper(raw_sheet, encoding="utf-8") as sheet:
+                sheet.write(
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                # Distinct string -> its <c> element, which references the string's index in the shared strings table
+                shared_string_cells = {}
+                def shared_string_cell_xml(value):
+                    cell_xml = shared_string_cells.get(value)
+                    if cell_xml is None:
+                        cell_xml = shared_string_cells[value] = f'<c t="s"><v>{len(shared_string_cells)}</v></c>'
+                    return cell_xml
+
+                header_cells = [shared_string_cell_xml(header) if type(header) is str else xlsx_cell_xml(header) for header in headers]
+                sheet.write(f'<row r="1">{"".join(header_cells)}</row>')
+                # Every column holds a single kind of value, so the cell type is decided once per column, not per cell
+                cell_builders = {'number': xlsx_number_cell_xml, 'string': shared_string_cell_xml}
+                column_cells = [cell_builders.get(column_value_kind(data[header]), xlsx_cell_xml) for header in headers]
+                rows = zip(*(data[header] for header in headers))
+                for row_number, row in enumerate(rows, start=2):
+                    sheet.write(f'<row r="{row_number}">{"".join([cell_xml(value) for cell_xml, value in zip(column_cells, row)])}</row>')
+                sheet.write('</sheetData></worksheet>')
+        with package.open("xl/sharedStrings.xml", "w") as raw_shared_strings:
+            with io.TextIOWrapper(raw_shared_strings, encoding="utf-8") as shared_strings:
+                shared_strings.write(
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" uniqueCount="{len(shared_string_cells)}">'
+                )
+                for value in shared_string_cells:
+                    shared_strings.write(f'<si><t xml:space="preserve">{xml_escape(value)}</t></si>')
+                shared_strings.write('</sst>')
+
+def write_xlsx_constant_memory(output_file, data):
+    """
+    Streams the columns to an .xlsx file row by row with xlsxwriter's constant memory mode, which flushes
+    each row to disk as soon as the next one is started.
+    """
+    # Values are plain data: skip the per-string checks for URLs and formulas in sheet.write
+    workbook = xlsxwriter.Workbook(output_file, {'constant_memory': True, 'strings_to_urls': False, 'strings_to_formulas': False, 'strings_to_numbers': False})
+    sheet = workbook.add_worksheet("Sheet1")
+    headers = list(data)
+    sheet.write_row(0, 0, headers)
+    # Typed writes for single-kind columns skip xlsxwriter's per-cell type detection
+    writers = {'number': sheet.write_number, 'string': sheet.write_string}
+    column_writers = [writers.get(column_value_kind(data[header]), sheet.write) for header in headers]
+    for row_index, row in enumerate(zip(*(data[header] for header in headers)), start=1):
+        for column_index, (write, value) in enumerate(zip(column_writers, row)):
+            write(row_index, column_index, value)
+    workbook.close()
+
+def write_xlsx_write_only(output_file, data):
+    """
+    Streams the columns to an .xlsx file row by row with openpyxl's write-only mode, which writes each
+    row out as it is appended instead of keeping a Cell object per value in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1") # Same sheet name as DataFrame.to_excel
+    headers = list(data)
+    sheet.append(headers)
+    for row in zip(*(data[header] for header in headers)):
+        sheet.append(row)
+    workbook.save(output_file)
+
 output_file = "projects_data.xlsx"
 try:
-    df.to_excel(output_file, index=False, engine='openpyxl')
+    write_xlsx_streaming(output_file, data)
     print(f"✔ קובץ נוצר בהצלחה: {output_file}")
 except Exception as e:
     print(f"Error creating Excel file: {e}")
-    # Try with xlsxwriter as alternative
+    # Try with a spreadsheet library as alternative: xlsxwriter if installed, otherwise openpyxl's write-only mode
+    fallback_name, fallback_writer = (
+        ("xlsxwriter", write_xlsx_constant_memory) if xlsxwriter is not None else ("openpyxl", write_xlsx_write_only)
+    )
     try:
-        df.to_excel(output_file, index=False, engine='xlsxwriter')
-        print(f"✔ קובץ נוצר בהצלחה (with xlsxwriter): {output_file}")
+        fallback_writer(output_file, data)
+        print(f"✔ קובץ נוצר בהצלחה (with {fallback_name}): {output_file}")
     except Exception as e2:
-        print(f"Error with xlsxwriter: {e2}")
\ No newline at end of file
+        print(f"Error with {fallback_name}: {e2}")
+
+# Save the same data as Parquet for scripts that read it back (e.g. generate_json.py), so they do not have
+# to parse the spreadsheet XML. The .xlsx file is still written for opening in Excel.
+if pq is not None:
+    parquet_file = "projects_data.parquet"
+    try:
+        pq.write_table(pa.table(data), parquet_file, compression='zstd')
+        print(f"✔ קובץ נוצר בהצלחה: {parquet_file}")
+    except Exception as e:
+        print(f"Error creating Parquet file: {e}")
@@ -12,6 +12,9 @@ import os
 import json
 from excel_functions import ExcelHandler
 
+# Set PLAYGROUND_DEBUG=1 to print cell A1 before and after every JSON command (for debugging the A1 issue)
+DEBUG = bool(os.environ.get('PLAYGROUND_DEBUG'))
+
 def print_help():
     """Print help information about available JSON operations."""
     print("\nAvailable Excel Operations:")
@@ -66,36 +69,37 @@ def inspect_sheet(excel_handler):
     print("First 6 cells of first 6 rows:")
     
     # Get max rows/cols to check (up to 6 of each)
-    max_row = min(6, excel_handler.sheet.max_row)
+    sheet = excel_handler.sheet
+    max_row = min(6, sheet.max_row)
+    max_col = min(6, sheet.max_column)
     
     # Display header
     print("\n    | A      | B      | C      | D      | E      | F      |")
     print("----|--------|--------|--------|--------|--------|--------|")
     
-    # Display cells
-    for row in range(1, max_row + 1):
+    # Display cells, reading the values of the whole block in one pass (columns past the sheet's last one are empty)
+    a1_value = None
+    try:
+        rows = list(sheet.iter_rows(min_row=1, max_row=max_row, max_col=max_col, values_only=True))
+    except Exception:
+        rows = [("ERROR",) * max_col] * max_row
+    for row, values in enumerate(rows, start=1):
+        if row == 1 and values:
+            a1_value = values[0]
         row_str = f"{row:3} |"
-        for col in range(1, 7):  # Columns A through F
-            try:
-                value = excel_handler.sheet.cell(row=row, column=col).value
-                if value is None:
-                    cell_str = "(empty)"
-                else:
-                    # Truncate long values
-                    cell_str = str(value)[:6] + "..." if len(str(value)) > 6 else str(value)
-                row_str += f" {cell_str:6} |"
-            except Exception:
-                row_str += " ERROR  |"
+        for value in values + (None,) * (6 - len(values)):  # Columns A through F
+            if value is None:
+                cell_str = "(empty)"
+            else:
+                # Truncate long values
+                cell_str = str(value)[:6] + "..." if len(str(value)) > 6 else str(value)
+            row_str += f" {cell_str:6} |"
         print(row_str)
     
     # Special check for cell A1 (debugging the A1 issue)
     print("\nCell A1 specific check:")
-    try:
-        a1_value = excel_handler.sheet.cell(row=1, column=1).value
-        print(f"  A1 value = {a1_value}")
-        print(f"  A1 type = {type(a1_value).__name__}")
-    except Exception as e:
-        print(f"  Error reading A1: {str(e)}")
+    print(f"  A1 value = {a1_value}")
+    print(f"  A1 type = {type(a1_value).__name__}")
     
     print("\nUse read commands for more detailed inspection.")
 
@@ -188,23 +192,25 @@ def main():
                 print(f"Processing JSON command...")
                 
                 # Check cell A1 before processing (for debugging the A1 issue)
-                try:
-                    a1_before = excel.sheet.cell(row=1, column=1).value
-                    print(f"DEBUG: A1 value BEFORE command = {a1_before}")
-                except Exception as e:
-                    print(f"DEBUG: Error reading A1 before command: {str(e)}")
+                if DEBUG:
+                    try:
+                        a1_before = excel.sheet.cell(row=1, column=1).value
+                        print(f"DEBUG: A1 value BEFORE command = {a1_before}")
+                    except Exception as e:
+                        print(f"DEBUG: Error reading A1 before command: {str(e)}")
                 
                 # Process the JSON command
                 reward, feedback = excel.process_json_operation(user_input)
                 
                 # Check cell A1 after processing (for debugging the A1 issue)
-                try:
-                    a1_after = excel.sheet.cell(row=1, column=1).value
-                    print(f"DEBUG: A1 value AFTER command = {a1_after}")
-                    if a1_before != a1_after:
-                        print(f"WARNING: A1 changed from '{a1_before}' to '{a1_after}'")
-                except Exception as e:
-                    print(f"DEBUG: Error reading A1 after command: {str(e)}")
+                if DEBUG:
+                    try:
+                        a1_after = excel.sheet.cell(row=1, column=1).value
+                        print(f"DEBUG: A1 value AFTER command = {a1_after}")
+                        if a1_before != a1_after:
+                            print(f"WARNING: A1 changed from '{a1_before}' to '{a1_after}'")
+                    except Exception as e:
+                        print(f"DEBUG: Error reading A1 after command: {str(e)}")
                 
                 # Print the result with color coding
                 if reward == 1:  # Success
@@ -1,9 +1,65 @@
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+# Upload large files in parallel chunks with hf_transfer when it is installed (pip install hf_transfer).
+# Must be set before huggingface_hub is imported; setting it without the package installed makes uploads fail.
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
 from huggingface_hub import HfApi
 
-api = HfApi()
-api.upload_file(
-    path_or_fileobj="synthetic_excel_data_gemini_hebrew_headers_raw_json_responses.json",
-    path_in_repo="data.json",
-    repo_id="SH4DMI/XLSX_JSON",
-    repo_type="dataset",
-)
+try:
+    import orjson  # Optional: much faster than json for loading and re-encoding the dataset
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard  # Optional: only needed when compress_with_zstd is enabled
+except ImportError:
+    zstandard = None
+
+# --- Configuration ---
+input_json_path = "synthetic_excel_data_gemini_hebrew_headers_raw_json_responses.json"
+hf_repo_id = "SH4DMI/XLSX_JSON"
+compress_with_zstd = False # Upload as data.json.zst (pip install zstandard) instead of data.json. Remove the other file from the repo when switching.
+zstd_level = 19
+# --- End Configuration ---
+
+def write_compact_json(path, outfile):
+    """Writes a JSON file to outfile without indentation or spaces, as raw UTF-8 (Hebrew is not \\u-escaped)."""
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read()) if orjson is not None else json.load(f)
+    if orjson is not None:
+        outfile.write(orjson.dumps(data))
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        for chunk in encoder.iterencode(data): # The zstandard stream writer has no writelines()
+            outfile.write(chunk.encode("utf-8"))
+
+if compress_with_zstd and zstandard is None:
+    sys.exit("compress_with_zstd is enabled but zstandard is not installed. Run: pip install zstandard")
+
+path_in_repo = "data.json.zst" if compress_with_zstd else "data.json"
+
+# Build the file on disk and upload it by path: hf_transfer is only used for uploads from a file,
+# and the compressed copy is never held in memory next to the data.
+with tempfile.TemporaryDirectory() as tmp_dir:
+    upload_path = os.path.join(tmp_dir, path_in_repo)
+    with open(upload_path, "wb") as outfile:
+        if compress_with_zstd:
+            with zstandard.ZstdCompressor(level=zstd_level).stream_writer(outfile, closefd=False) as writer:
+                write_compact_json(input_json_path, writer)
+        else:
+            write_compact_json(input_json_path, outfile)
+    print(f"Uploading {os.path.getsize(upload_path):,} bytes (from {os.path.getsize(input_json_path):,}) as {path_in_repo}")
+
+    api = HfApi()
+    api.upload_file(
+        path_or_fileobj=upload_path,
+        path_in_repo=path_in_repo,
+        repo_id=hf_repo_id,
+        repo_type="dataset",
+    )
@@ -1,28 +1,35 @@
 import json
+import os
+import shutil
+import tempfile
 from datasets import Dataset, Features, Value, Sequence
 from huggingface_hub import HfApi, HfFolder
 
+try:
+    import ijson # Optional: streams the entries of a JSON array instead of loading the whole file
+except ImportError:
+    ijson = None
+
 # --- Configuration ---
-input_json_path = 'gemini_parsed_responses_details.json'  # <--- CHANGE THIS to the actual path of your JSON file
+input_json_path = 'gemini_parsed_responses_details.jsonl'  # <--- CHANGE THIS to the actual path of your JSON (array) or JSON Lines (.jsonl) file
 hf_repo_id = "SH4DMI/XLSX1"  # <--- CHANGE THIS to your desired Hugging Face repo ID (e.g., "jsmith/excel-instructions-he")
 # --- End Configuration ---
 
-def transform_data(input_path):
-    """Loads the original JSON, transforms it, and returns a list of dictionaries."""
-    transformed_entries = []
-    try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            original_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Input file not found at '{input_path}'")
-        return None
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from '{input_path}'. Check file format.")
-        return None
-
-    print(f"Loaded {len(original_data)} entries from {input_path}")
-
-    for entry in original_data:
+def iter_source_entries(input_path):
+    """Yields the original entries one at a time, from a JSON Lines file or from a JSON array."""
+    with open(input_path, 'rb') as f:
+        if input_path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif ijson is not None:
+            yield from ijson.items(f, 'item', use_float=True) # Plain floats, as json.load would give
+        else:
+            yield from json.load(f)
+
+def transform_data(input_path, stats):
+    """Streams the original entries and yields them transformed, counting them in stats."""
+    for entry in iter_source_entries(input_path):
         try:
             # Extract original instruction
             instruction = entry['parsed_function_call_json']['instruction']
@@ -37,28 +44,25 @@ def transform_data(input_path):
 
             # Extract headers
             excel_headers = entry['excel_headers']
-
-            # Create the new entry for the dataset
-            transformed_entries.append({
-                "instruction": instruction,
-                "ground_truth_function": ground_truth_string,
-                "excel_headers": excel_headers
-            })
         except KeyError as e:
             print(f"Warning: Skipping entry due to missing key: {e}. Entry data: {entry}")
+            stats['skipped'] += 1
+            continue
         except Exception as e:
             print(f"Warning: Skipping entry due to unexpected error: {e}. Entry data: {entry}")
-
-
-    print(f"Successfully transformed {len(transformed_entries)} entries.")
-    return transformed_entries
-
-def push_to_huggingface(data_list, repo_id):
-    """Creates a Hugging Face Dataset and pushes it to the Hub."""
-    if not data_list:
-        print("No data to push.")
-        return
-
+            stats['skipped'] += 1
+            continue
+
+        # Create the new entry for the dataset
+        stats['transformed'] += 1
+        yield {
+            "instruction": instruction,
+            "ground_truth_function": ground_truth_string,
+            "excel_headers": excel_headers
+        }
+
+def push_to_huggingface(input_path, repo_id):
+    """Creates a Hugging Face Dataset from the transformed entries and pushes it to the Hub."""
     print(f"\nPreparing to push data to Hugging Face repository: {repo_id}")
 
     # Define the features (schema) of the dataset
@@ -68,10 +72,20 @@ def push_to_huggingface(data_list, repo_id):
         'excel_headers': Sequence(Value('string'))
     })
 
-    # Create Hugging Face Dataset object from the list of dictionaries
-    # Using from_list is generally efficient for moderate sized lists
+    # Create Hugging Face Dataset object straight from the transformed entries
+    # from_generator writes them to Arrow as they are produced, so the source is never held in memory as a list.
+    # A fresh cache directory makes sure the file is always read again, instead of reusing a cached copy of its path.
+    stats = {'transformed': 0, 'skipped': 0}
+    cache_dir = tempfile.mkdtemp()
     try:
-        hf_dataset = Dataset.from_list(data_list, features=features)
+        hf_dataset = Dataset.from_generator(
+            transform_data, features=features, cache_dir=cache_dir,
+            gen_kwargs={'input_path': input_path, 'stats': stats}
+        )
+        print(f"Successfully transformed {stats['transformed']} entries ({stats['skipped']} skipped).")
+        if len(hf_dataset) == 0:
+            print("No data to push.")
+            return
         print("Hugging Face Dataset object created.")
 
         # Push the dataset to the Hub
@@ -86,15 +100,16 @@ def push_to_huggingface(data_list, repo_id):
         print("1. You are logged in (`huggingface-cli login`).")
         print("2. The repository ID is correct and you have write access.")
         print("3. Your internet connection.")
+    finally:
+        # ignore_errors: on Windows the Arrow files can still be memory-mapped by the dataset
+        shutil.rmtree(cache_dir, ignore_errors=True)
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    # 1. Transform the data
-    transformed_data = transform_data(input_json_path)
-
-    # 2. Push to Hugging Face (only if transformation was successful)
-    if transformed_data:
-        # Make sure you are logged in before running this
-        push_to_huggingface(transformed_data, hf_repo_id)
+    if not os.path.exists(input_json_path):
+        print(f"Error: Input file not found at '{input_json_path}'")
+        print("Data transformation failed. Nothing pushed to Hugging Face.")
     else:
-        print("Data transformation failed. Nothing pushed to Hugging Face.")
\ No newline at end of file
+        # Transform the data and push it to Hugging Face
+        # Make sure you are logged in before running this
+        push_to_huggingface(input_json_path, hf_repo_id)
\ No newline at end of file
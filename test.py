@@ -6,11 +6,16 @@ Comprehensive Excel Functions Test Suite
 This script provides a comprehensive test suite for all Excel operations,
 testing both direct method calls and JSON-based operations.
 It tests success cases, failure cases, and edge cases.
+
+Every test works on its own in-memory workbook and its own temporary files, so
+the suite can also run in parallel, e.g. with pytest-xdist: pytest -n auto test.py
 """
 
 import unittest
 import json
 import os
+import tempfile
+from openpyxl import load_workbook
 from excel_functions import ExcelHandler
 
 class TestExcelFunctions(unittest.TestCase):
@@ -21,11 +26,8 @@ class TestExcelFunctions(unittest.TestCase):
     
     def setUp(self):
         """Prepare test environment before each test case."""
-        self.test_file = "test_excel.xlsx"
-        # Remove test file if it exists from previous test runs
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
-        self.excel = ExcelHandler(self.test_file)
+        # Keep the workbook in memory, so operations do not save the whole file after every change
+        self.excel = ExcelHandler(None)
         
         # Set up some initial data for tests that need existing data
         self.setup_initial_data()
@@ -34,14 +36,13 @@ class TestExcelFunctions(unittest.TestCase):
         """Clean up after each test case."""
         # Close workbook to release file handle
         self.excel.workbook.close()
-        # Remove test file after tests
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
     
     def setup_initial_data(self):
         """Set up initial data for tests that need existing data."""
+        # The fixture is trusted, so rows are appended straight to the (empty) sheet instead of
+        # going through write_row's validation and logging; write_row has its own tests.
         # Create a header row
-        self.excel.write_row(1, ["ID", "Name", "Age", "Department", "Salary"])
+        self.excel.sheet.append(["ID", "Name", "Age", "Department", "Salary"])
         
         # Add some sample data
         employees = [
@@ -50,11 +51,32 @@ class TestExcelFunctions(unittest.TestCase):
             [3, "Robert Brown", 28, "Marketing", 65000]
         ]
         
-        for i, employee in enumerate(employees):
-            self.excel.write_row(i + 2, employee)
-        
-        # Save the workbook
-        self.excel.workbook.save(self.test_file)
+        for employee in employees:
+            self.excel.sheet.append(employee)
+    
+    def temp_path(self, filename):
+        """
+        Return a path for filename in a temporary directory of this test, removed after the test.
+        Only tests that really write files use it, and parallel tests never share a file.
+        """
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        return os.path.join(temp_dir.name, filename)
+    
+    def read_saved_rows(self, path):
+        """
+        Read the values of the active sheet of a saved workbook, as lists. Only values are
+        needed, so formulas, styles and external links are not loaded, and nothing is saved back.
+        """
+        workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        try:
+            return [list(row) for row in workbook.active.iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+    
+    def read_grid(self, max_row, max_col):
+        """Read the values of the top-left max_row x max_col region of the sheet in one pass, as lists."""
+        return [list(row) for row in self.excel.sheet.iter_rows(min_row=1, max_row=max_row, max_col=max_col, values_only=True)]
     
     #
     # DIRECT API TESTS
@@ -97,7 +119,44 @@ class TestExcelFunctions(unittest.TestCase):
         success_invalid, message_invalid = self.excel.add_row(-1, "Invalid row")
         self.assertFalse(success_invalid)
         self.assertIn("must be positive", message_invalid)
-    
+
+    def test_direct_batch_add_row(self):
+        """Test queued row inserts in batch mode."""
+        # Queue inserts relative to the sheet before the batch
+        self.excel.begin_batch()
+        self.excel.add_row(3, "Insert A")
+        self.excel.add_row(2, "Insert B")
+        self.excel.add_row(3, "Insert C")
+        
+        # Nothing is applied before flushing
+        cell_value, _ = self.excel.read_cell(2, 1)
+        self.assertEqual(cell_value, 1)
+        
+        # Flush the batch
+        success, message = self.excel.flush_batch()
+        
+        # Verify
+        self.assertTrue(success)
+        self.assertIn("3 queued row inserts", message)
+        column, _ = self.excel.read_column("A")
+        self.assertEqual(column, ["ID", "Insert B", 1, "Insert C", "Insert A", 2, 3])
+
+    def test_direct_batch_mutators_apply_queued_inserts(self):
+        """Test that other writes in batch mode see the queued row inserts."""
+        self.excel.begin_batch()
+        self.excel.add_row(2, "Inserted")
+        
+        # Writes apply the queue first, so row 2 is the inserted row
+        self.excel.write_cell(2, 2, "Written")
+        self.excel.add_row("next_available", "Appended")
+        self.excel.add_row(2, "Inserted 2")
+        self.excel.flush_batch()
+        
+        column, _ = self.excel.read_column("A")
+        self.assertEqual(column, ["ID", "Inserted 2", "Inserted", 1, 2, 3, "Appended"])
+        cell_value, _ = self.excel.read_cell(3, 2)
+        self.assertEqual(cell_value, "Written")
+
     def test_direct_write_cell(self):
         """Test writing to a cell directly."""
         # Write to cell
@@ -119,10 +178,6 @@ class TestExcelFunctions(unittest.TestCase):
         # Verify content
         cell_value_letter, _ = self.excel.read_cell(3, "B")
         self.assertEqual(cell_value_letter, "Column Letter Test")
-        
-        # Test invalid input
-        success_invalid, message_invalid = self.excel.write_cell("invalid", 1, "Test")
-        self.assertFalse(success_invalid)
     
     def test_direct_write_row(self):
         """Test writing an entire row directly."""
@@ -147,15 +202,43 @@ class TestExcelFunctions(unittest.TestCase):
         mixed_result, _ = self.excel.read_row(3)
         self.assertEqual(mixed_result, mixed_row)
         
-        # Test invalid input
-        success_invalid, message_invalid = self.excel.write_row("invalid", row_data)
-        self.assertFalse(success_invalid)
-        
         # Test non-iterable input
         success_non_iterable, message_non_iterable = self.excel.write_row(2, "not iterable")
         self.assertFalse(success_non_iterable)
         self.assertIn("iterable collection, not a string", message_non_iterable)
     
+    def test_direct_write_block(self):
+        """Test writing a block of rows directly."""
+        # Write a block starting at B2
+        block = [["Block Name 1", 50], ["Block Name 2", 51]]
+        success, message = self.excel.write_block(2, "B", block)
+        
+        # Verify
+        self.assertTrue(success)
+        self.assertIn("B2:C3", message)
+        
+        # Verify content
+        row2, _ = self.excel.read_row(2)
+        row3, _ = self.excel.read_row(3)
+        self.assertEqual(row2, [1, "Block Name 1", 50, "Engineering", 75000])
+        self.assertEqual(row3, [2, "Block Name 2", 51, "Finance", 82000])
+        
+        # Test invalid input
+        success_invalid_data, message_invalid_data = self.excel.write_block(2, 1, "not rows")
+        self.assertFalse(success_invalid_data)
+        self.assertIn("list of rows", message_invalid_data)
+        
+        # Empty and ragged rows are rejected without touching the sheet
+        success_empty_row, message_empty_row = self.excel.write_block(2, 1, [[]])
+        self.assertFalse(success_empty_row)
+        self.assertIn("at least one value", message_empty_row)
+        
+        success_ragged, message_ragged = self.excel.write_block(2, 1, [["x", "y"], ["z"]])
+        self.assertFalse(success_ragged)
+        self.assertIn("same number of values", message_ragged)
+        row2, _ = self.excel.read_row(2)
+        self.assertEqual(row2[0], 1)
+    
     def test_direct_clear_cell(self):
         """Test clearing a cell directly."""
         # Set up a cell with data
@@ -180,10 +263,6 @@ class TestExcelFunctions(unittest.TestCase):
         self.excel.write_cell(3, "C", "Test Cell Letter")
         success_letter, _ = self.excel.clear_cell(3, "C")
         self.assertTrue(success_letter)
-        
-        # Test invalid input
-        success_invalid, _ = self.excel.clear_cell("invalid", 3)
-        self.assertFalse(success_invalid)
     
     def test_direct_clear_row(self):
         """Test clearing a row directly."""
@@ -202,10 +281,6 @@ class TestExcelFunctions(unittest.TestCase):
         # Verify row 3 is now at position 2
         row2_after, _ = self.excel.read_row(2)
         self.assertEqual(row2_after, row3_before)
-        
-        # Test invalid input
-        success_invalid, _ = self.excel.clear_row("invalid")
-        self.assertFalse(success_invalid)
     
     def test_direct_clear_column(self):
         """Test clearing a column directly."""
@@ -227,10 +302,6 @@ class TestExcelFunctions(unittest.TestCase):
         # Test with column letter
         success_letter, _ = self.excel.clear_column("B")  # Now Age becomes column B
         self.assertTrue(success_letter)
-        
-        # Test invalid input
-        success_invalid, _ = self.excel.clear_column("invalid")
-        self.assertFalse(success_invalid)
     
     def test_direct_read_header_row(self):
         """Test reading the header row directly."""
@@ -261,10 +332,6 @@ class TestExcelFunctions(unittest.TestCase):
         # Verify
         self.assertIsNotNone(column_letter)
         self.assertEqual(column_letter, column)
-        
-        # Test invalid input
-        column_invalid, _ = self.excel.read_column("invalid")
-        self.assertIsNone(column_invalid)
     
     def test_direct_read_cell(self):
         """Test reading a cell directly."""
@@ -279,10 +346,6 @@ class TestExcelFunctions(unittest.TestCase):
         # Read with column letter
         cell_letter, _ = self.excel.read_cell(2, "B")
         self.assertEqual(cell_letter, "John Smith")
-        
-        # Test invalid input
-        cell_invalid, _ = self.excel.read_cell(-1, 1)
-        self.assertIsNone(cell_invalid)
     
     def test_direct_read_row(self):
         """Test reading a row directly."""
@@ -295,10 +358,6 @@ class TestExcelFunctions(unittest.TestCase):
         self.assertIn("read", message)
         self.assertEqual(row[0], 1)  # ID
         self.assertEqual(row[1], "John Smith")  # Name
-        
-        # Test invalid input
-        row_invalid, _ = self.excel.read_row("invalid")
-        self.assertIsNone(row_invalid)
     
     def test_direct_get_column_index_by_header(self):
         """Test finding column index by header directly."""
@@ -314,6 +373,42 @@ class TestExcelFunctions(unittest.TestCase):
         self.assertIsNone(col_invalid)
         self.assertIn("not found", message_invalid)
     
+    def test_direct_export_sheet(self):
+        """Test exporting the sheet values to a new file."""
+        export_file = self.temp_path("test_excel_export.xlsx")
+        
+        # Export the sheet
+        success, message = self.excel.export_sheet(export_file)
+        
+        # Verify
+        self.assertTrue(success)
+        self.assertIn("4 rows", message)
+        
+        # Verify exported content
+        exported_rows = self.read_saved_rows(export_file)
+        self.assertEqual(exported_rows[1], [1, "John Smith", 35, "Engineering", 75000])
+    
+    def test_direct_export_sheet_in_batch(self):
+        """Test that exporting in batch mode leaves the queued row inserts alone."""
+        export_file = self.temp_path("test_excel_export.xlsx")
+        
+        self.excel.begin_batch()
+        self.excel.add_row(2, "Inserted")
+        success, message = self.excel.export_sheet(export_file)
+        
+        # The export holds the sheet without the queued insert
+        self.assertTrue(success)
+        self.assertIn("4 rows", message)
+        exported_rows = self.read_saved_rows(export_file)
+        self.assertEqual(exported_rows[1][0], 1)
+        
+        # The insert is still applied on flush
+        success_flush, message_flush = self.excel.flush_batch()
+        self.assertTrue(success_flush)
+        self.assertIn("1 queued row inserts", message_flush)
+        cell_value, _ = self.excel.read_cell(2, 1)
+        self.assertEqual(cell_value, "Inserted")
+    
     #
     # JSON API TESTS
     #
@@ -467,6 +562,42 @@ class TestExcelFunctions(unittest.TestCase):
         reward_invalid, _ = self.excel.process_json_operation(json_invalid)
         self.assertEqual(reward_invalid, -1)
     
+    def test_json_write_block(self):
+        """Test writing a block of rows with JSON."""
+        # Write block
+        json_input = json.dumps({
+            "function_name": "excel_write_block",
+            "parameters": {
+                "start_row": 5,
+                "start_col": 1,
+                "data": [[4, "JSON Block", 40], [5, "JSON Block 2", 45]]
+            }
+        })
+        
+        reward, feedback = self.excel.process_json_operation(json_input)
+        
+        # Verify
+        self.assertEqual(reward, 1)
+        self.assertIn("Success", feedback)
+        
+        # Verify rows were written
+        row_data, _ = self.excel.read_row(6)
+        self.assertEqual(row_data[:3], [5, "JSON Block 2", 45])
+        
+        # Test non-rectangular input
+        json_invalid = json.dumps({
+            "function_name": "excel_write_block",
+            "parameters": {
+                "start_row": 5,
+                "start_col": 1,
+                "data": [[1, 2], [3]]
+            }
+        })
+        
+        reward_invalid, feedback_invalid = self.excel.process_json_operation(json_invalid)
+        self.assertEqual(reward_invalid, -1)
+        self.assertIn("same number of values", feedback_invalid)
+    
     def test_json_clear_cell(self):
         """Test clearing a cell with JSON."""
         # Clear cell
@@ -693,7 +824,61 @@ class TestExcelFunctions(unittest.TestCase):
         self.assertEqual(reward, -1)
         self.assertIn("Error", feedback)
         self.assertIn("missing", feedback)
+    
+    def test_json_operations_batch(self):
+        """Test processing a list of JSON operations at once."""
+        # Back the handler with a file, to verify the batch is saved to disk
+        test_file = self.temp_path("test_excel.xlsx")
+        self.excel.filename = test_file
+        
+        json_inputs = [
+            json.dumps({
+                "function_name": "excel_write_cell",
+                "parameters": {"row_index": 5, "col_index": 1, "text": "Batch"}
+            }),
+            json.dumps({
+                "function_name": "excel_read_cell",
+                "parameters": {"row_index": 5, "col_index": 1}
+            }),
+            "This is not valid JSON"
+        ]
+        
+        results = self.excel.process_json_operations(json_inputs)
+        
+        # Verify one result per operation, in order
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0], 1)
+        self.assertEqual(results[1][0], 1)
+        self.assertIn("Batch", results[1][1])
+        self.assertEqual(results[2][0], -1)
+        self.assertIn("Invalid JSON", results[2][1])
+        
+        # Verify the workbook was saved after the batch
+        saved_rows = self.read_saved_rows(test_file)
+        self.assertEqual(saved_rows[4][0], "Batch")
 
+    def test_json_operations_batch_save_failure(self):
+        """Test that a failed save after a batch is reported for the operations that changed the sheet."""
+        # The directory does not exist, so saving the workbook fails
+        self.excel.filename = self.temp_path(os.path.join("missing_dir", "test_excel.xlsx"))
+        
+        write_input = json.dumps({
+            "function_name": "excel_write_cell",
+            "parameters": {"row_index": 5, "col_index": 1, "text": "Batch"}
+        })
+        read_input = json.dumps({
+            "function_name": "excel_read_cell",
+            "parameters": {"row_index": 2, "col_index": 2}
+        })
+        
+        results = self.excel.process_json_operations([write_input, read_input])
+        
+        # The write was not saved, so it fails like the same operation on its own; the read still succeeds
+        self.assertEqual(results[0][0], -1)
+        self.assertIn("Error saving workbook", results[0][1])
+        self.assertEqual(results[1][0], 1)
+        self.assertEqual(self.excel.process_json_operation(write_input)[0], -1)
+    
     def test_write_cell_does_not_affect_a1(self):
         """Test that writing to a cell does not affect cell A1."""
         # Set up initial state - write something to A1
@@ -708,14 +893,11 @@ class TestExcelFunctions(unittest.TestCase):
         b2_value = "Value in B2"
         self.excel.write_cell(2, 2, b2_value)
         
-        # Verify B2 has the right value
-        b2_value_after, _ = self.excel.read_cell(2, 2)
-        self.assertEqual(b2_value_after, b2_value)
-        
-        # Verify A1 still has its original value (not modified)
-        a1_value_after, _ = self.excel.read_cell(1, 1)
-        self.assertEqual(a1_value_after, initial_a1_value, 
-                         "Cell A1 was modified when writing to B2")
+        # Verify B2 has the right value and A1 still has its original value (not modified), like every other cell
+        self.assertEqual(self.read_grid(2, 5), [
+            [initial_a1_value, "Name", "Age", "Department", "Salary"],
+            [1, b2_value, 35, "Engineering", 75000]
+        ], "Only B2 should change when writing to B2")
     
     def test_json_write_cell_does_not_affect_a1(self):
         """Test that writing to a cell via JSON does not affect cell A1."""
@@ -743,14 +925,11 @@ class TestExcelFunctions(unittest.TestCase):
         self.assertEqual(reward, 1)
         self.assertIn("Success", feedback)
         
-        # Verify B2 has the right value
-        b2_value_after, _ = self.excel.read_cell(2, 2)
-        self.assertEqual(b2_value_after, "JSON Value in B2")
-        
-        # Verify A1 still has its original value (not modified)
-        a1_value_after, _ = self.excel.read_cell(1, 1)
-        self.assertEqual(a1_value_after, initial_a1_value, 
-                         "Cell A1 was modified when writing to B2 via JSON")
+        # Verify B2 has the right value and A1 still has its original value (not modified), like every other cell
+        self.assertEqual(self.read_grid(2, 5), [
+            [initial_a1_value, "Name", "Age", "Department", "Salary"],
+            [1, "JSON Value in B2", 35, "Engineering", 75000]
+        ], "Only B2 should change when writing to B2 via JSON")
 
     def test_comprehensive_excel_operations(self):
         """A comprehensive test of all Excel operations to ensure they work as expected."""
@@ -775,16 +954,13 @@ class TestExcelFunctions(unittest.TestCase):
         # Write to D4
         self.excel.write_cell(4, "D", "Finance")
         
-        # 4. Read and verify each cell
-        a1_value, _ = self.excel.read_cell(1, "A")
-        b2_value, _ = self.excel.read_cell(2, "B")
-        c3_value, _ = self.excel.read_cell(3, "C")
-        d4_value, _ = self.excel.read_cell(4, "D")
-        
-        self.assertEqual(a1_value, "Employee ID", "A1 should contain 'Employee ID'")
-        self.assertEqual(b2_value, "Jane Doe", "B2 should contain 'Jane Doe'")
-        self.assertEqual(c3_value, 28, "C3 should contain 28")
-        self.assertEqual(d4_value, "Finance", "D4 should contain 'Finance'")
+        # 4. Read and verify each cell: A1, B2, C3 and D4 hold the written values, the rest of the header is intact
+        self.assertEqual(self.read_grid(4, 4), [
+            ["Employee ID", "Name", "Age", "Department"],
+            [None, "Jane Doe", None, None],
+            [None, None, 28, None],
+            [None, None, None, "Finance"]
+        ], "A1, B2, C3 and D4 should contain 'Employee ID', 'Jane Doe', 28 and 'Finance'")
         
         # 5. Test write_row again, ensuring it doesn't affect other cells
         self.excel.write_row(2, [101, "John Smith", 35, "Engineering"])
@@ -794,13 +970,12 @@ class TestExcelFunctions(unittest.TestCase):
         self.assertEqual(row2_data, [101, "John Smith", 35, "Engineering"], "Row 2 should match what was written")
         
         # Verify other cells remain unchanged
-        a1_check, _ = self.excel.read_cell(1, "A")
-        c3_check, _ = self.excel.read_cell(3, "C")
-        d4_check, _ = self.excel.read_cell(4, "D")
-        
-        self.assertEqual(a1_check, "Employee ID", "A1 should still contain 'Employee ID'")
-        self.assertEqual(c3_check, 28, "C3 should still contain 28")
-        self.assertEqual(d4_check, "Finance", "D4 should still contain 'Finance'")
+        self.assertEqual(self.read_grid(4, 4), [
+            ["Employee ID", "Name", "Age", "Department"],
+            [101, "John Smith", 35, "Engineering"],
+            [None, None, 28, None],
+            [None, None, None, "Finance"]
+        ], "A1, C3 and D4 should still contain 'Employee ID', 28 and 'Finance'")
         
         # 6. Test JSON operations for writing to cells
         json_write_b3 = json.dumps({
@@ -843,20 +1018,35 @@ class TestExcelFunctions(unittest.TestCase):
 
     def test_invalid_inputs_handling(self):
         """Test how the Excel functions handle invalid inputs."""
-        # Test invalid row index
-        success, _ = self.excel.write_cell("invalid", 1, "Test")
-        self.assertFalse(success, "Should fail with invalid row index")
-        
-        # Test invalid column index
-        success, _ = self.excel.write_cell(1, "invalid$column", "Test")
-        self.assertFalse(success, "Should fail with invalid column index")
+        # (method, arguments, description): operations return False and reads return None on invalid input
+        operation_cases = [
+            ("write_cell", ("invalid", 1, "Test"), "invalid row index"),
+            ("write_cell", (1, "invalid$column", "Test"), "invalid column index"),
+            ("write_cell", (-1, 1, "Test"), "negative row index"),
+            ("write_cell", (1, -1, "Test"), "negative column index"),
+            ("write_row", ("invalid", [1, "Name"]), "invalid row index"),
+            ("write_block", ("invalid", 1, [[1, "Name"]]), "invalid start row"),
+            ("write_block", (True, 1, [[1, "Name"]]), "boolean start row"),
+            ("write_block", (2, True, [[1, "Name"]]), "boolean start column"),
+            ("clear_cell", ("invalid", 3), "invalid row index"),
+            ("clear_row", ("invalid",), "invalid row index"),
+            ("clear_column", ("invalid",), "invalid column index"),
+        ]
+        read_cases = [
+            ("read_column", ("invalid",), "invalid column index"),
+            ("read_cell", (-1, 1), "negative row index"),
+            ("read_row", ("invalid",), "invalid row index"),
+        ]
         
-        # Test negative indices
-        success, _ = self.excel.write_cell(-1, 1, "Test") 
-        self.assertFalse(success, "Should fail with negative row index")
+        for method, args, description in operation_cases:
+            with self.subTest(method=method, args=args):
+                success, _ = getattr(self.excel, method)(*args)
+                self.assertFalse(success, f"{method} should fail with {description}")
         
-        success, _ = self.excel.write_cell(1, -1, "Test")
-        self.assertFalse(success, "Should fail with negative column index")
+        for method, args, description in read_cases:
+            with self.subTest(method=method, args=args):
+                value, _ = getattr(self.excel, method)(*args)
+                self.assertIsNone(value, f"{method} should return None with {description}")
         
         # Test JSON invalid inputs
         json_invalid_row = json.dumps({